@@ -0,0 +1,196 @@
+# 性能基准：覆盖所有求解路径与公式，结果以JSON输出，便于在不同提交之间比较
+#
+#   python benchmarks/run_benchmarks.py --sizes 1000,100000 -o bench.json
+#   python benchmarks/run_benchmarks.py --compare old.json bench.json
+import argparse
+import csv
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import wetbulb
+from wetbulb import (METHOD_NAMES, METHOD_RANGES, calculate_esat, calculate_dedt, esat_calculate,
+                     calculate_wetbulb, calculate_dewpoint, calculate_both, derived_parameters)
+from wetbulb.vector import (calculate_esat_array, calculate_dedt_array, esat_inverse_array,
+                            calculate_wetbulb_array, calculate_dewpoint_array, calculate_both_array)
+from wetbulb.batch import run_batch
+
+def best_time(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def make_inputs(formula, size, seed=0):
+    # 在公式的适用范围内生成干球、露点、湿球、相对湿度与气压
+    rng = np.random.default_rng(seed)
+    lo, hi = METHOD_RANGES[formula]
+    T = rng.uniform(lo, hi, size)
+    Td = np.maximum(T - rng.uniform(0, 10, size), lo)
+    P = rng.uniform(500, 1100, size)
+    rh = rng.uniform(5, 100, size)
+    T_w, _, _, _ = calculate_wetbulb_array(Td, T, Td, P, formula)
+    T_w = np.where(np.isfinite(T_w), T_w, Td)
+    return T, Td, T_w, rh, P
+
+def scalar_cases(formula, T, Td, T_w, rh, P, tol):
+    e = [calculate_esat(t, formula) for t in Td]
+    return {
+        'calculate_esat': lambda: [calculate_esat(t, formula) for t in T],
+        'calculate_dedt': lambda: [calculate_dedt(t, formula) for t in T],
+        'esat_calculate': lambda: [esat_calculate(x, formula, 500, tol) for x in e],
+        'calculate_wetbulb': lambda: [calculate_wetbulb(d, t, d, p, tol=tol, formulas=[formula])
+                                      for t, d, p in zip(T, Td, P)],
+        'calculate_dewpoint': lambda: [calculate_dewpoint(t, w, p, tol=tol, formulas=[formula])
+                                       for t, w, p in zip(T, T_w, P)],
+        'calculate_both': lambda: [calculate_both(t - 5, t, r, p, tol=tol, formulas=[formula])
+                                   for t, r, p in zip(T, rh, P)],
+        'derived_parameters': lambda: [derived_parameters(formula, t, d, w, 0.5, p)
+                                       for t, d, w, p in zip(T, Td, T_w, P)],
+    }
+
+def array_cases(formula, T, Td, T_w, rh, P, tol):
+    e = calculate_esat_array(Td, formula)
+    return {
+        'calculate_esat_array': lambda: calculate_esat_array(T, formula),
+        'calculate_dedt_array': lambda: calculate_dedt_array(T, formula),
+        'esat_inverse_array': lambda: esat_inverse_array(e, formula, 500, tol),
+        'calculate_wetbulb_array': lambda: calculate_wetbulb_array(Td, T, Td, P, formula, tol=tol),
+        'calculate_dewpoint_array': lambda: calculate_dewpoint_array(T, T_w, P, formula, tol=tol),
+        'calculate_both_array': lambda: calculate_both_array(None, T, rh, P, formula, tol=tol),
+    }
+
+def write_input(path, size, seed=0):
+    rng = np.random.default_rng(seed)
+    T = np.round(rng.uniform(-30, 40, size), 1)
+    Td = np.round(T - rng.uniform(0, 10, size), 1)
+    P = np.round(rng.uniform(800, 1050, size), 1)
+    if path.endswith('.csv'):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['A', 'B', 'C'])
+            writer.writerows(zip(T.tolist(), Td.tolist(), P.tolist()))
+    else:
+        import openpyxl
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(['A', 'B', 'C'])
+        for row in zip(T.tolist(), Td.tolist(), P.tolist()):
+            sheet.append(row)
+        workbook.save(path)
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def run(sizes, formulas, scalar_limit, batch_limit, repeat, tol):
+    results = []
+
+    def record(name, formula, size, seconds):
+        per_second = size / seconds if seconds > 0 else None
+        results.append({
+            'name': name,
+            'formula': formula,
+            'size': size,
+            'seconds': seconds,
+            'per_second': per_second,
+        })
+        # 计时为0（规模太小、计时器精度不足）时不给速率
+        rate = f'{per_second:14.0f}' if per_second is not None else f"{'-':>14s}"
+        print(f"{name:28s} {formula or '-':12s} {size:>9d}  {rate} /s", file=sys.stderr)
+
+    for formula in formulas:
+        for size in sizes:
+            inputs = make_inputs(formula, size)
+            for name, fn in array_cases(formula, *inputs, tol).items():
+                record(name, formula, size, best_time(fn, repeat))
+        # 标量接口逐个调用，只在一个规模下计时
+        n = min(max(sizes), scalar_limit)
+        for name, fn in scalar_cases(formula, *make_inputs(formula, n), tol).items():
+            record(name, formula, n, best_time(fn, 1))
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            if size > batch_limit:
+                continue
+            for extension in ('.csv', '.xlsx'):
+                source = os.path.join(directory, f'input_{size}{extension}')
+                write_input(source, size)
+                for mode in (0, 1, 2):
+                    target = os.path.join(directory, f'output{extension}')
+                    seconds = best_time(lambda: run_batch(source, target, mode, tol=tol), 1)
+                    record(f'run_batch{extension}[mode={mode}]', None, size, seconds)
+
+    return {
+        'version': wetbulb.__version__,
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'tol': tol,
+        'results': results,
+    }
+
+def compare(old_path, new_path, threshold):
+    # 吞吐量下降超过threshold的项目视为性能回退，返回回退项目数
+    with open(old_path, encoding='utf-8') as f:
+        old = {(r['name'], r['formula'], r['size']): r for r in json.load(f)['results']}
+    with open(new_path, encoding='utf-8') as f:
+        new = json.load(f)['results']
+    regressions = 0
+    for r in new:
+        before = old.get((r['name'], r['formula'], r['size']))
+        if before is None or not before['per_second'] or not r['per_second']:
+            continue
+        ratio = r['per_second'] / before['per_second']
+        flag = ''
+        if ratio < 1 - threshold:
+            flag = '  <-- 回退'
+            regressions += 1
+        print(f"{r['name']:28s} {r['formula'] or '-':12s} {r['size']:>9d}  x{ratio:6.2f}{flag}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='湿球计算器性能基准')
+    parser.add_argument('--sizes', default='1000,100000', help='逗号分隔的输入规模（默认1000,100000）')
+    parser.add_argument('--formulas', default='all', help='逗号分隔的公式名，默认全部14个')
+    parser.add_argument('--scalar-limit', type=int, default=1000, help='标量接口最多计时的调用次数')
+    parser.add_argument('--batch-limit', type=int, default=100000, help='批量文件计时的最大行数')
+    parser.add_argument('--repeat', type=int, default=3, help='数组接口重复次数，取最短时间')
+    parser.add_argument('--tol', type=float, default=1e-6)
+    parser.add_argument('-o', '--output', help='JSON输出文件，默认输出到stdout')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='比较两份结果并列出回退项目')
+    parser.add_argument('--threshold', type=float, default=0.1, help='判定回退的吞吐量下降比例（默认0.1）')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(*args.compare, args.threshold) else 0
+
+    formulas = METHOD_NAMES if args.formulas == 'all' else args.formulas.split(',')
+    sizes = [int(size) for size in args.sizes.split(',')]
+    report = run(sizes, formulas, args.scalar_limit, args.batch_limit, args.repeat, args.tol)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
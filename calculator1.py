@@ -191,6 +191,8 @@ class Ui_wetbulb(object):
         self.ComboBox_2.setObjectName("ComboBox_2")
         self.ComboBox_2.addItem("")
         self.ComboBox_2.addItem("")
+        self.ComboBox_2.addItem("")
+        self.ComboBox_2.addItem("")
         self.horizontalLayout_2.addWidget(self.ComboBox_2)
         self.pushButton = qfluentwidgets.PushButton(self.layoutWidget)
         self.pushButton.setMaximumSize(QtCore.QSize(96, 16777215))
@@ -208,7 +210,7 @@ class Ui_wetbulb(object):
         self.horizontalLayout_8.addLayout(self.verticalLayout)
         self.verticalLayout_8 = QtWidgets.QVBoxLayout()
         self.verticalLayout_8.setObjectName("verticalLayout_8")
-        self.ProgressBar = IndeterminateProgressBar(wetbulb)
+        self.ProgressBar = ProgressBar(wetbulb)
         self.ProgressBar.setObjectName("ProgressBar")
         self.verticalLayout_8.addWidget(self.ProgressBar)
         self.listView_2 = QtWidgets.QListView(wetbulb)
@@ -251,5 +253,7 @@ class Ui_wetbulb(object):
         self.widget_iteration.setTitle(_translate("wetbulb", "迭代区"))
         self.ComboBox_2.setItemText(0, _translate("wetbulb", "Tw=Td"))
         self.ComboBox_2.setItemText(1, _translate("wetbulb", "Tw=T-n"))
+        self.ComboBox_2.setItemText(2, _translate("wetbulb", "Stull估计"))
+        self.ComboBox_2.setItemText(3, _translate("wetbulb", "沿用相邻解"))
         self.pushButton.setText(_translate("wetbulb", "显示迭代图"))
 from qfluentwidgets import LineEdit,ProgressBar,IndeterminateProgressBar
@@ -0,0 +1 @@
+# 让pytest从仓库根目录导入wetbulb包（无需安装）
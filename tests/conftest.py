@@ -0,0 +1,18 @@
+import os
+
+import numpy as np
+import pytest
+
+@pytest.fixture(autouse=True, scope='session')
+def _cache_dir(tmp_path_factory):
+    # 查表、网格缓存写到临时目录，不碰用户的~/.cache/wetbulb
+    os.environ['WETBULB_CACHE_DIR'] = str(tmp_path_factory.mktemp('cache'))
+
+@pytest.fixture
+def samples():
+    # 常见范围内的随机输入：干球、露点（不高于干球，不低于-8℃）、气压
+    rng = np.random.default_rng(2024)
+    T = rng.uniform(-5.0, 45.0, 300)
+    Td = T - rng.uniform(0.0, 1.0, 300) * (T + 8.0)  # Goff水面公式适用于-10℃以上
+    P = rng.uniform(600.0, 1050.0, 300)
+    return T, Td, P
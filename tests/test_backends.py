@@ -0,0 +1,48 @@
+# 查表、多项式后端与湿球网格的误差界
+import numpy as np
+import pytest
+
+from wetbulb.formulas import METHOD_NAMES, METHOD_RANGES
+from wetbulb.grid import wetbulb_lookup
+from wetbulb.poly import DEFAULT_TOL, error_report
+from wetbulb.solver import STATUS_OK
+from wetbulb.tables import ESatTable, get_table
+from wetbulb.vector import calculate_esat_array, calculate_dedt_array, calculate_wetbulb_array
+
+@pytest.mark.parametrize('method', METHOD_NAMES)
+def test_table_error(method):
+    table = get_table(method)
+    assert table.max_rel_error < 1e-9
+    assert table.max_rel_error_dedt < 1e-6
+    T = np.random.default_rng(3).uniform(*METHOD_RANGES[method], 500)
+    assert calculate_esat_array(T, method, 'table') == pytest.approx(calculate_esat_array(T, method), rel=1e-9)
+    assert calculate_dedt_array(T, method, 'table') == pytest.approx(calculate_dedt_array(T, method), rel=1e-6)
+
+def test_table_cache_round_trip():
+    table = get_table('Buck-水面')
+    table.save()
+    loaded = ESatTable.load('Buck-水面')
+    assert np.array_equal(loaded.e, table.e)
+    assert loaded.max_rel_error == table.max_rel_error
+
+def test_poly_error():
+    report = error_report()
+    assert [item['method'] for item in report] == METHOD_NAMES
+    for item in report:
+        assert item['ok'], item['method']
+        assert item['max_rel_error'] <= DEFAULT_TOL
+
+@pytest.mark.parametrize('backend', ['table', 'poly'])
+def test_backend_wetbulb(samples, backend):
+    T, Td, P = samples
+    exact, _, _, _ = calculate_wetbulb_array(Td, T, Td, P)
+    T_w, _, _, status = calculate_wetbulb_array(Td, T, Td, P, backend=backend)
+    assert (status == STATUS_OK).all()
+    assert T_w == pytest.approx(exact, abs=1e-6)
+
+def test_grid_lookup(samples):
+    # 一次牛顿校正后最大误差约1e-3℃，两次后约1e-6℃
+    T, Td, P = samples
+    exact, _, _, _ = calculate_wetbulb_array(Td, T, Td, P, tol=1e-12)
+    assert wetbulb_lookup(T, Td, P) == pytest.approx(exact, abs=2e-3)
+    assert wetbulb_lookup(T, Td, P, polish=2) == pytest.approx(exact, abs=1e-5)
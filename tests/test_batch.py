@@ -0,0 +1,219 @@
+# 批量求解：整列结果与标量求解一致，结果文件、结果库与多进程的往返
+import os
+
+import numpy as np
+import pytest
+
+from wetbulb.batch import BatchCancelled, output_columns, run_batch, solve_rows, _merge_rows, _to_float
+from wetbulb.cache import SolveCache
+from wetbulb.cli import main
+from wetbulb.derived import derived_parameters
+from wetbulb.ensemble import ensemble_solve
+from wetbulb.formulas import calculate_esat
+from wetbulb.sheets import SheetReader, SheetWriter
+from wetbulb.solver import (STATUS_OK, MODE_DEWPOINT, MODE_WETBULB, MODE_RH, GUESS_STULL, GUESS_PREVIOUS,
+                            MIN_ITER_LEGACY, calculate_wetbulb, calculate_dewpoint, calculate_both)
+from wetbulb.units import to_celsius, from_celsius
+
+def _goff(T):
+    return 'Goff-水面' if T >= 0 else 'Goff-冰面'
+
+def _write_input(path, T, B, P):
+    writer = SheetWriter(str(path))
+    writer.write_rows([['A', 'B', 'C']] + [[float(a), float(b), float(c)] for a, b, c in zip(T, B, P)])
+    writer.close()
+
+def _read_output(path):
+    with SheetReader(str(path)) as reader:
+        rows = [row for chunk in reader.chunks() for row in chunk]
+    return reader.header, np.array([[np.nan if value in (None, '') else float(value) for value in row]
+                                    for row in rows])
+
+def test_progress_and_cancel(tmp_path, samples):
+    T, Td, P = samples
+    _write_input(tmp_path / 'in.csv', T, Td, P)
+    calls = []
+    run_batch(str(tmp_path / 'in.csv'), str(tmp_path / 'out.csv'), MODE_DEWPOINT, chunk_size=50,
+              progress=lambda *args: calls.append(args), progress_interval=0)
+    assert calls[-1][:2] == (len(T), len(T))
+    assert [done for done, *_ in calls] == sorted(done for done, *_ in calls)
+    # 取消时抛出BatchCancelled，不留下结果文件与临时文件
+    with pytest.raises(BatchCancelled):
+        run_batch(str(tmp_path / 'in.csv'), str(tmp_path / 'cancelled.csv'), MODE_DEWPOINT, chunk_size=50,
+                  cancel=lambda: True)
+    assert not os.path.exists(tmp_path / 'cancelled.csv')
+    assert not os.path.exists(tmp_path / 'cancelled.csv.part')
+
+def test_solve_rows_matches_scalar(samples):
+    # 开尔文与Pa输入，按干球温度自动选择Goff水面/冰面公式
+    T, Td, P = samples
+    T_K, Td_K = from_celsius(T, 'K'), from_celsius(Td, 'K')
+    dew, = solve_rows(MODE_DEWPOINT, T_K, Td_K, P * 100, 'K', 'Pa', min_iter=MIN_ITER_LEGACY)
+    rh = np.array([100 * calculate_esat(d, _goff(t)) / calculate_esat(t, _goff(t)) for t, d in zip(T, Td)])
+    Td_back, = solve_rows(MODE_WETBULB, T_K, dew, P * 100, 'K', 'Pa')
+    both = solve_rows(MODE_RH, T, rh, P, min_iter=MIN_ITER_LEGACY)
+    for i in range(0, len(T), 7):
+        item = calculate_wetbulb(Td[i], T[i], Td[i], P[i], formulas=[_goff(T[i])]).methods[0]
+        assert item.status == STATUS_OK
+        assert to_celsius(dew[i], 'K') == pytest.approx(item.value1, abs=1e-9)
+        assert rh[i] == pytest.approx(item.rh * 100, abs=1e-9)
+        item = calculate_dewpoint(T[i], item.value1, P[i], formulas=[_goff(T[i])]).methods[0]
+        assert to_celsius(Td_back[i], 'K') == pytest.approx(item.value1, abs=1e-9)
+        item = calculate_both(None, T[i], rh[i], P[i], formulas=[_goff(T[i])]).methods[0]
+        assert both[0][i] == pytest.approx(item.value1, abs=1e-9)
+        assert both[1][i] == pytest.approx(item.value2, abs=1e-9)
+
+def test_selected_formulas(samples):
+    # 只计算所选公式，每个公式一列，与单独求解该公式相同
+    T, Td, P = samples
+    formulas = ['Buck-水面', 'Goff-水面']
+    results = solve_rows(MODE_DEWPOINT, T, Td, P, formulas=formulas, min_iter=MIN_ITER_LEGACY)
+    assert len(results) == len(output_columns(MODE_DEWPOINT, formulas=formulas)) == 2
+    for formula, values in zip(formulas, results):
+        np.testing.assert_array_equal(values, solve_rows(MODE_DEWPOINT, T, Td, P, formulas=[formula],
+                                                         min_iter=MIN_ITER_LEGACY)[0])
+        for i in range(0, len(T), 25):
+            item = calculate_wetbulb(Td[i], T[i], Td[i], P[i], formulas=[formula]).methods[0]
+            if item.status == STATUS_OK:
+                assert values[i] == pytest.approx(item.value1, abs=1e-9)
+            else:
+                assert np.isnan(values[i])
+
+def test_ensemble(samples):
+    T, Td, P = samples
+    formulas = ['Goff-水面', 'Buck-水面', 'Wexler-水面']
+    result = ensemble_solve(MODE_DEWPOINT, T, Td, P, formulas)
+    assert result.Tw.shape == (3, len(T))
+    for k, formula in enumerate(formulas):
+        T_w, = solve_rows(MODE_DEWPOINT, T, Td, P, formulas=[formula])
+        np.testing.assert_allclose(result.Tw[k], T_w, equal_nan=True, atol=1e-12)
+    stats = result.stats()
+    np.testing.assert_allclose(stats['spread'], np.nanmax(result.Tw, 0) - np.nanmin(result.Tw, 0))
+
+def test_ensemble_rh_statistics_skip_failed_wetbulb():
+    # 湿球不收敛的公式保留露点供显示，但露点统计与逐公式列一样不计入
+    T, rh, P = np.array([5.0, 25.0]), np.array([0.5, 60.0]), np.array([1000.0, 1000.0])
+    formulas = ['Goff-水面', 'Goff-冰面', 'Magnus-水面']
+    result = ensemble_solve(MODE_RH, T, rh, P, formulas, tol=1e-12)
+    result.status[0, 0] = 4  # 模拟一个公式湿球未收敛
+    stats = result.stats('Td')
+    ok = result.status == STATUS_OK
+    np.testing.assert_array_equal(stats['count'], ok.sum(0))
+    np.testing.assert_allclose(stats['mean'], [np.nanmean(np.where(ok, result.Td, np.nan)[:, k]) for k in range(2)])
+    calculator = result.to_calculator((0,))
+    assert calculator.methods[0].status2 == 4 and calculator.methods[0].value1 == result.Td[0, 0]
+    assert calculator.statistics(1)['count'] == stats['count'][0]
+
+def test_ensemble_columns_match_per_formula_columns(samples):
+    T, Td, P = samples
+    rh = np.array([100 * calculate_esat(d, _goff(t)) / calculate_esat(t, _goff(t)) for t, d in zip(T, Td)])
+    formulas = ['Goff-水面', 'Goff-冰面', 'Buck-冰面']
+    columns = solve_rows(MODE_RH, T, rh, P, formulas=formulas, ensemble=True)
+    per_formula = np.array(columns[:2 * len(formulas)])
+    Td_columns = per_formula[0::2]
+    np.testing.assert_allclose(columns[2 * len(formulas)], np.nanmean(Td_columns, 0), equal_nan=True, atol=1e-12)
+    count = np.isfinite(Td_columns).sum(0)
+    np.testing.assert_array_equal(columns[2 * len(formulas) + 5], np.where(count > 0, count, np.nan))
+
+def test_cells_to_float_and_merge():
+    values = _to_float([1, '2.5', None, '', 'abc', ' 3 ', True])
+    np.testing.assert_array_equal(values, [1.0, 2.5, np.nan, np.nan, np.nan, 3.0, 1.0])
+    rows = [[1, 'x', 2], [3, None, 4, 'extra', 'more'], [5, 6, 7]]
+    merged = _merge_rows(rows, 4, [1, 3], [np.array([0.5, np.nan, 1.5]), np.array([np.nan, 2.0, 3.0])])
+    assert merged == [[1, 0.5, 2, None], [3, None, 4, 2.0, 'more'], [5, 1.5, 7, 3.0]]
+
+@pytest.mark.parametrize('name', ['in.csv', 'in.xlsx'])
+def test_run_batch_round_trip(tmp_path, samples, name):
+    T, Td, P = samples
+    _write_input(tmp_path / name, T, Td, P)
+    output = tmp_path / f'out_{name}'
+    stats = run_batch(str(tmp_path / name), str(output), MODE_DEWPOINT, chunk_size=64)
+    header, values = _read_output(output)
+    assert stats.rows == len(T)
+    assert header[3:] == output_columns(MODE_DEWPOINT)
+    expected, = solve_rows(MODE_DEWPOINT, T, Td, P)
+    np.testing.assert_allclose(values[:, 3], expected, atol=1e-12)
+
+def test_workers_keep_row_order(tmp_path, samples):
+    T, Td, P = samples
+    _write_input(tmp_path / 'in.csv', T, Td, P)
+    run_batch(str(tmp_path / 'in.csv'), str(tmp_path / 'a.csv'), MODE_RH, chunk_size=40)
+    stats = run_batch(str(tmp_path / 'in.csv'), str(tmp_path / 'b.csv'), MODE_RH, chunk_size=40, workers=2)
+    assert stats.workers == 2 and stats.failed_chunks == 0
+    np.testing.assert_array_equal(_read_output(tmp_path / 'b.csv')[1], _read_output(tmp_path / 'a.csv')[1])
+
+def test_cli_batch(tmp_path, samples, capsys):
+    T, Td, P = samples
+    _write_input(tmp_path / 'in.csv', T, Td, P)
+    code = main(['batch', str(tmp_path / 'in.csv'), '-o', str(tmp_path / 'out.csv'), '--guess', 'stull', '--quiet'])
+    assert code == 0
+    _, values = _read_output(tmp_path / 'out.csv')
+    expected, = solve_rows(MODE_DEWPOINT, T, Td, P)
+    np.testing.assert_allclose(values[:, 3], expected, atol=1e-8)
+
+def test_solve_rows_cache(samples):
+    # 第二次求解全部命中缓存，结果与不用缓存时相同
+    T, Td, P = samples
+    formulas = ['Buck-水面', 'Goff-水面']
+    results = solve_rows(MODE_DEWPOINT, T, Td, P, formulas=formulas)
+    cache = SolveCache(1000)
+    for _ in range(2):
+        cached = solve_rows(MODE_DEWPOINT, T, Td, P, formulas=formulas, cache=cache)
+        for values, expected in zip(cached, results):
+            np.testing.assert_array_equal(values, expected)
+    assert cache.hits == len(T)
+
+def test_solve_cached():
+    from wetbulb.cache import solve_cached
+
+    cache = SolveCache(8)
+    first = solve_cached(cache, MODE_DEWPOINT, 20.0, 25.0, 20.0, 1000.0)
+    assert solve_cached(cache, MODE_DEWPOINT, 20.0, 25.0, 20.0, 1000.0) is first
+    direct = calculate_wetbulb(20.0, 25.0, 20.0, 1000.0)
+    assert [item.value1 for item in first.methods] == [item.value1 for item in direct.methods]
+
+def test_dedup(tmp_path, samples):
+    # 第一块中每行重复一次：只求解不同的行，结果与不去重时相同
+    T, Td, P = samples
+    T, Td, P = np.r_[T[:50], T], np.r_[Td[:50], Td], np.r_[P[:50], P]
+    _write_input(tmp_path / 'in.csv', T, Td, P)
+    stats = run_batch(str(tmp_path / 'in.csv'), str(tmp_path / 'a.csv'), MODE_DEWPOINT, chunk_size=100)
+    assert stats.solved_rows == len(T) - 50
+    run_batch(str(tmp_path / 'in.csv'), str(tmp_path / 'b.csv'), MODE_DEWPOINT, chunk_size=100, dedup=False)
+    np.testing.assert_array_equal(_read_output(tmp_path / 'a.csv')[1], _read_output(tmp_path / 'b.csv')[1])
+
+def test_derived_columns(samples):
+    # 扩展参数列跟在结果列之后，数值与逐行的derived_parameters相同（温度类按用户单位）
+    T, Td, P = samples
+    names = ['rh', 'mixing_ratio', 'theta_e']
+    results = solve_rows(MODE_DEWPOINT, from_celsius(T, 'K'), from_celsius(Td, 'K'), P, 'K', derived=names)
+    assert len(results) == len(output_columns(MODE_DEWPOINT, 'K', derived=names)) == 4
+    for i in range(0, len(T), 30):
+        Tw = to_celsius(results[0][i], 'K')
+        d = derived_parameters(_goff(T[i]), T[i], Td[i], Tw, results[1][i] / 100, P[i])
+        assert results[2][i] == pytest.approx(d['mixing_ratio'], rel=1e-9)
+        assert to_celsius(results[3][i], 'K') == pytest.approx(d['theta_e'], rel=1e-9)
+
+def test_result_store(tmp_path, samples):
+    # 第二次运行全部取自结果库，输出相同；选项不同时不会取到旧结果
+    T, Td, P = samples
+    _write_input(tmp_path / 'in.csv', T, Td, P)
+    store = str(tmp_path / 'results.db')
+    first = run_batch(str(tmp_path / 'in.csv'), str(tmp_path / 'a.csv'), MODE_RH, chunk_size=100, store_path=store,
+                      derived=['theta_e'])
+    assert first.store_hits == 0
+    second = run_batch(str(tmp_path / 'in.csv'), str(tmp_path / 'b.csv'), MODE_RH, chunk_size=100, store_path=store,
+                       derived=['theta_e'])
+    assert second.store_hits == second.rows
+    np.testing.assert_array_equal(_read_output(tmp_path / 'b.csv')[1], _read_output(tmp_path / 'a.csv')[1])
+    third = run_batch(str(tmp_path / 'in.csv'), str(tmp_path / 'c.csv'), MODE_RH, chunk_size=100, store_path=store)
+    assert third.store_hits == 0
+
+def test_guess_previous_matches(samples):
+    T, Td, P = samples
+    order = np.argsort(T)  # 近似按时间排列的平滑序列
+    T, Td, P = T[order], Td[order], P[order]
+    reference, = solve_rows(MODE_DEWPOINT, T, Td, P)
+    for strategy in (GUESS_STULL, GUESS_PREVIOUS):
+        T_w, = solve_rows(MODE_DEWPOINT, T, Td, P, guess_strategy=strategy)
+        assert T_w == pytest.approx(reference, abs=1e-8)
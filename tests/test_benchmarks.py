@@ -0,0 +1,34 @@
+import importlib.util
+import json
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture(scope='module')
+def bench():
+    spec = importlib.util.spec_from_file_location('run_benchmarks',
+                                                  os.path.join(ROOT, 'benchmarks', 'run_benchmarks.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def test_smoke(tmp_path, bench, capsys):
+    # 最小规模跑一遍全部求解路径，结果可与自身比较且没有回退
+    output = str(tmp_path / 'bench.json')
+    assert bench.main(['--sizes', '20', '--formulas', 'Goff-水面', '--scalar-limit', '5', '--batch-limit', '20',
+                       '--repeat', '1', '-o', output]) == 0
+    with open(output, encoding='utf-8') as f:
+        names = {result['name'] for result in json.load(f)['results']}
+    assert {'calculate_wetbulb_array', 'calculate_wetbulb', 'run_batch.csv[mode=2]'} <= names
+    assert bench.main(['--compare', output, output]) == 0
+
+def test_zero_time(tmp_path, bench, monkeypatch):
+    # 计时为0时只是没有速率，不应中断
+    monkeypatch.setattr(bench, 'best_time', lambda fn, repeat: 0.0)
+    output = str(tmp_path / 'bench.json')
+    assert bench.main(['--sizes', '20', '--formulas', 'Goff-水面', '--scalar-limit', '5', '--batch-limit', '20',
+                       '--repeat', '1', '-o', output]) == 0
+    with open(output, encoding='utf-8') as f:
+        assert all(result['per_second'] is None for result in json.load(f)['results'])
@@ -0,0 +1,40 @@
+import math
+
+import numpy as np
+import pytest
+
+from wetbulb.derived import Rd, derived_parameters, DERIVED_PARAMETERS
+from wetbulb.derived_vector import DerivedEvaluator, dependencies, derived_parameters_array
+
+def test_theta_e_reference():
+    # 1000hPa、25℃、露点20℃：θe = θ·exp(L_v·q/(c_p·T))，L_v以J/kg计，约62.8℃
+    d = derived_parameters('Goff-水面', 25, 20, 21.5, 0.74, 1000)
+    T_K = 298.15
+    Cp = 1004.7463 + 0.05*25
+    L_v = (2500.8 - 2.3665*25 - 0.0023*25**2 + 1.87e-5*25**3 - 4.2e-8*25**4)*1000
+    q = d['specific_humidity']/1000
+    expected = T_K*(1000/1000)**(Rd/Cp)*math.exp(L_v*q/(Cp*T_K)) - 273.15
+    assert d['theta'] == pytest.approx(25)
+    assert d['theta_e'] == pytest.approx(expected, abs=1e-9)
+    assert 60 < d['theta_e'] < 65
+
+def test_array_matches_scalar():
+    T_g = np.array([25.0, 10.0, -5.0, 35.0])
+    Td = np.array([20.0, 2.0, -12.0, 15.0])
+    Tw = np.array([21.5, 5.5, -7.0, 21.0])
+    rh = np.array([0.74, 0.58, 0.58, 0.30])
+    P = np.array([1000.0, 850.0, 700.0, 1013.25])
+    values = derived_parameters_array('Goff-水面', T_g, Td, Tw, rh, P)
+    for i in range(len(T_g)):
+        d = derived_parameters('Goff-水面', T_g[i], Td[i], Tw[i], rh[i], P[i])
+        for name in DERIVED_PARAMETERS:
+            assert values[name][i] == pytest.approx(d[name], rel=1e-12, abs=1e-12), name
+
+def test_only_needed_nodes_are_computed():
+    evaluator = DerivedEvaluator('Goff-水面', [25.0, 10.0], [20.0, 2.0], [21.5, 5.5], [0.74, 0.58], 1000.0)
+    evaluator.evaluate(['theta'])
+    assert evaluator.computed == dependencies(['theta']) == ['T_g_K', 'Cp', 'theta_K', 'theta']
+    # 共用的中间量只计算一次
+    evaluator.evaluate(['theta_e', 'theta_v'])
+    assert len(evaluator.computed) == len(set(evaluator.computed))
+    assert 'es' not in evaluator.computed
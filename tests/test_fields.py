@@ -0,0 +1,42 @@
+# 格点场：逐块求解的结果与整列求解一致，与块的大小无关
+import numpy as np
+import pytest
+
+from wetbulb.batch import solve_rows
+from wetbulb.fields import solve_fields
+from wetbulb.solver import MODE_DEWPOINT, MODE_RH
+
+@pytest.fixture
+def fields(tmp_path):
+    rng = np.random.default_rng(5)
+    T = rng.uniform(265.0, 310.0, (3, 7, 11))
+    rh = rng.uniform(10.0, 100.0, T.shape)
+    P = np.array([1000.0, 850.0, 700.0]).reshape(3, 1, 1)
+    np.save(tmp_path / 'T.npy', T)
+    np.save(tmp_path / 'rh.npy', rh)
+    return T, rh, P
+
+@pytest.mark.parametrize('tile_size', [5, 77, 1 << 20])
+def test_fields_match_rows(tmp_path, fields, tile_size):
+    T, rh, P = fields
+    paths = solve_fields(MODE_RH, str(tmp_path / 'T.npy'), str(tmp_path / 'rh.npy'), P, tmp_path / 'out',
+                         prefix='x_', temperature_unit='K', tile_size=tile_size)
+    assert sorted(paths) == ['Td', 'Tw']
+    Td, Tw = solve_rows(MODE_RH, T.ravel(), rh.ravel(), np.broadcast_to(P, T.shape).ravel(), 'K')
+    np.testing.assert_array_equal(np.load(paths['Td']), Td.reshape(T.shape))
+    np.testing.assert_array_equal(np.load(paths['Tw']), Tw.reshape(T.shape))
+
+def test_fields_method_and_progress(tmp_path, fields):
+    T, _, P = fields
+    Td = T - 5.0
+    calls = []
+    paths = solve_fields(MODE_DEWPOINT, T.astype(np.float32), Td.astype(np.float32), 101325.0, tmp_path,
+                         method='Buck-水面', temperature_unit='K', pressure_unit='Pa', tile_size=100,
+                         progress=lambda done, total: calls.append((done, total)))
+    Tw = np.load(paths['Tw'])
+    assert Tw.dtype == np.float32
+    expected, = solve_rows(MODE_DEWPOINT, T.astype(np.float32).ravel(), Td.astype(np.float32).ravel(), 101325.0,
+                           'K', 'Pa', formulas=['Buck-水面'])
+    np.testing.assert_allclose(Tw.ravel(), expected, rtol=1e-6, equal_nan=True)
+    assert np.isnan(Tw[T < 273.15]).all()  # Buck水面公式不适用于0℃以下
+    assert calls[-1] == (T.size, T.size)
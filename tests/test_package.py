@@ -0,0 +1,15 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _run(code):
+    return subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                          cwd=ROOT).stdout.split()
+
+def test_import_is_headless():
+    # 导入核心库不加载界面与numpy；数组接口在首次访问时才加载numpy
+    loaded = _run('import sys, wetbulb; print("numpy" in sys.modules, "PySide2" in sys.modules); '
+                  'wetbulb.calculate_wetbulb_array; print("numpy" in sys.modules)')
+    assert loaded == ['False', 'False', 'True']
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from wetbulb.profile import profile_solve
+from wetbulb.solver import calculate_wetbulb
+
+P = [1000.0, 850.0, 700.0, 500.0]
+T = [25.0, 15.0, 3.0, -15.0]
+Td = [20.0, 10.0, -5.0, -30.0]
+
+def test_levels_match_scalar():
+    r = profile_solve(P, T, Td)
+    for k in range(len(P)):
+        name = 'Goff-水面' if T[k] >= 0 else 'Goff-冰面'
+        item = calculate_wetbulb(Td[k], T[k], Td[k], P[k], formulas=[name]).methods[0]
+        assert r.Tw[k] == pytest.approx(item.value1, abs=1e-10)
+        assert r.rh[k] == pytest.approx(item.rh, abs=1e-12)
+    assert r.z[0] == 0
+    assert np.all(np.diff(r.z) > 0)
+    assert r.Tw[1] > 0 >= r.Tw[2]
+    assert r.z[1] < r.wbz_height < r.z[2]
+    assert r.theta_e[0] == pytest.approx(62.8, abs=0.5)
+
+def test_missing_level_is_skipped():
+    # 850hPa缺温度：高度跨过该层继续积分，湿球零度层仍能求出
+    full = profile_solve(P, T, Td)
+    r = profile_solve(P, [25.0, np.nan, 3.0, -15.0], Td)
+    assert np.isnan(r.z[1])
+    assert np.all(np.isfinite(r.z[[0, 2, 3]]))
+    assert r.z[3] == pytest.approx(full.z[3], rel=1e-3)
+    assert r.wbz_height == pytest.approx(full.wbz_height, rel=0.01)
+
+def test_missing_wetbulb_does_not_hide_crossing():
+    # 700hPa缺露点：在850与500hPa之间寻找湿球零度
+    r = profile_solve(P, T, [20.0, 10.0, np.nan, -30.0])
+    assert np.isnan(r.Tw[2]) and np.isfinite(r.z[2])
+    assert r.z[1] < r.wbz_height < r.z[3]
+
+def test_padded_profiles():
+    r = profile_solve([P, [1000.0, 850.0, np.nan, np.nan]], [T, [25.0, 15.0, np.nan, np.nan]],
+                      [Td, [20.0, 10.0, np.nan, np.nan]])
+    assert r.z.shape == (2, 4)
+    assert np.isnan(r.wbz_height[1])
+    assert r.z[1, 1] == pytest.approx(r.z[0, 1])
+
+def test_cold_surface():
+    r = profile_solve(P, [-1.0, -5.0, -10.0, -15.0], [-3.0, -8.0, -15.0, -30.0])
+    assert r.wbz_height == 0
+    assert r.wbz_pressure == 1000
+
+def test_profile_batch(tmp_path):
+    # 两条廓线，第二条各层顺序打乱；结果与直接求解一致，按原行序写出
+    from wetbulb.profile import run_profile_batch
+    from wetbulb.sheets import SheetReader, SheetWriter
+
+    rows = [['s1', P[k], T[k], Td[k]] for k in range(4)] + [['s2', P[k], T[k] + 2, Td[k] + 1] for k in (2, 0, 3, 1)]
+    writer = SheetWriter(str(tmp_path / 'in.csv'))
+    writer.write_rows([['A', 'B', 'C', 'D']] + rows)
+    writer.close()
+    stats = run_profile_batch(str(tmp_path / 'in.csv'), str(tmp_path / 'out.csv'), chunk_size=3)
+    assert stats.rows == 8
+    with SheetReader(str(tmp_path / 'out.csv')) as reader:
+        out = [row for chunk in reader.chunks() for row in chunk]
+    first = profile_solve(P, T, Td)
+    second = profile_solve(P, np.add(T, 2), np.add(Td, 1))
+    for k in range(4):
+        assert float(out[k][4]) == pytest.approx(first.Tw[k], abs=1e-9)
+        assert float(out[k][8]) == pytest.approx(first.z[k], abs=1e-6)
+    for row, k in zip(out[4:], (2, 0, 3, 1)):
+        assert float(row[4]) == pytest.approx(second.Tw[k], abs=1e-9)
+        assert float(row[9]) == pytest.approx(second.wbz_height, abs=1e-6)
+
+def test_dry_low_levels():
+    # 低层很干（露点远低于水面公式的下限-10℃）时各层仍能求出湿球温度，湿球零度层在近地面
+    P_dry = [1000.0, 950.0, 900.0, 850.0, 800.0, 700.0]
+    T_dry = [15.0, 10.0, 6.0, 3.0, 1.0, -5.0]
+    Td_dry = [-15.0, -18.0, -20.0, -22.0, -25.0, -30.0]
+    r = profile_solve(P_dry, T_dry, Td_dry)
+    assert (r.status == 0).all()
+    assert np.all((r.Tw > Td_dry) & (r.Tw < T_dry))
+    for k in range(len(P_dry)):
+        name = 'Goff-水面' if T_dry[k] >= 0 else 'Goff-冰面'
+        item = calculate_wetbulb(0.0, T_dry[k], Td_dry[k], P_dry[k], formulas=[name]).methods[0]
+        assert r.Tw[k] == pytest.approx(item.value1, abs=1e-8)
+    assert r.z[1] < r.wbz_height < r.z[2]
+    assert 900 < r.wbz_pressure < 950
@@ -0,0 +1,29 @@
+import pytest
+
+from wetbulb.sheets import SheetReader, SheetWriter
+
+@pytest.mark.parametrize('name', ['out.csv', 'out.xlsx'])
+def test_round_trip_and_close_twice(tmp_path, name):
+    path = str(tmp_path / name)
+    writer = SheetWriter(path)
+    writer.write_rows([['A', 'B', 'C'], [25.0, 20.0, 1000.0], [30.0, 18.0, 990.0]])
+    writer.close()
+    writer.close()  # 出错后的清理会再次关闭，不应抛出异常
+    with SheetReader(path) as reader:
+        assert reader.header == ['A', 'B', 'C']
+        rows = [row for chunk in reader.chunks() for row in chunk]
+    assert [[float(value) for value in row] for row in rows] == [[25, 20, 1000], [30, 18, 990]]
+
+@pytest.mark.parametrize('name', ['in.csv', 'in.xlsx'])
+def test_blank_rows_kept(tmp_path, name):
+    # 数据之间的空行保留为空行，输出与输入逐行对应；末尾的空行忽略
+    path = str(tmp_path / name)
+    writer = SheetWriter(path)
+    writer.write_rows([['A', 'B', 'C'], [25, 20, 1000], [None, None, None], [30, 18, 990], [None, None, None]])
+    writer.close()
+    with SheetReader(path, chunk_size=2) as reader:
+        rows = [row for chunk in reader.chunks() for row in chunk]
+    assert len(rows) == 3
+    assert rows[1] == [None, None, None]
+    with SheetReader(path, keep_blank=False) as reader:
+        assert len([row for chunk in reader.chunks() for row in chunk]) == 2
@@ -0,0 +1,34 @@
+# 标量求解器：结果记录与迭代追踪
+from wetbulb.solver import (STATUS_OK, STATUS_NOT_APPLICABLE, STATUS_NOT_CONVERGED, CalculatorMemory,
+                            calculate_wetbulb)
+
+def test_trace_is_optional():
+    plain = calculate_wetbulb(20.0, 25.0, 20.0, 1000.0)
+    traced = calculate_wetbulb(20.0, 25.0, 20.0, 1000.0, trace=True)
+    assert not plain.tracing and plain.iteration_data == {}
+    assert [item.value1 for item in traced.methods] == [item.value1 for item in plain.methods]
+    data = traced.iteration_data
+    ok = [item.method for item in traced.methods if item.status == STATUS_OK]
+    assert set(ok) <= set(data)
+    for item in data.values():
+        assert item['iterations'] == list(range(1, len(item['iterations']) + 1))
+    assert STATUS_NOT_APPLICABLE in [item.status for item in traced.methods]  # Buck冰面等不适用于20℃
+
+def test_trace_ring_buffer_keeps_latest():
+    calculator = CalculatorMemory(trace=True, capacity=4)
+    for k in range(10):
+        calculator.add_iteration('Goff-水面', k + 1, 20.0 + k, -k)
+    data = calculator.iteration_data['Goff-水面']
+    assert data['iterations'] == [7, 8, 9, 10]
+    assert data['residuals'] == [6.0, 7.0, 8.0, 9.0]
+
+def test_statistics():
+    calculator = CalculatorMemory()
+    calculator.add_result('a', 20.0)
+    calculator.add_result('b', 22.0)
+    calculator.add_result('c', 30.0, status2=STATUS_NOT_CONVERGED)  # 湿球失败的公式不计
+    calculator.add_status('d', STATUS_NOT_APPLICABLE)
+    stats = calculator.statistics()
+    assert stats['count'] == 2
+    assert stats['mean'] == 21.0 and stats['spread'] == 2.0 and stats['std'] == 1.0
+    assert CalculatorMemory().statistics() is None
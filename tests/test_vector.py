@@ -0,0 +1,138 @@
+# 数组求解器与标量求解器的对照：结果与状态码逐元素一致
+import numpy as np
+import pytest
+
+from wetbulb.formulas import METHOD_NAMES, METHOD_RANGES, calculate_esat, calculate_dedt, esat_calculate
+from wetbulb.solver import (STATUS_OK, STATUS_NOT_APPLICABLE, MIN_ITER_LEGACY, GUESS_TD, GUESS_T_MINUS_N,
+                            GUESS_STULL, initial_guess, calculate_wetbulb, calculate_dewpoint, calculate_both)
+from wetbulb.vector import (calculate_esat_array, calculate_dedt_array, esat_inverse_array, calculate_wetbulb_array,
+                            calculate_dewpoint_array, calculate_both_array)
+
+def _points(method, n=40):
+    # 在公式适用范围内（加上两侧各5℃，包含不适用的点）取干球与露点
+    lo, hi = METHOD_RANGES[method]
+    rng = np.random.default_rng(METHOD_NAMES.index(method))
+    T = rng.uniform(max(lo, -60) - 5, min(hi, 60) + 5, n)
+    Td = T - rng.uniform(0.0, 20.0, n)
+    P = rng.uniform(500.0, 1050.0, n)
+    return T, Td, P
+
+@pytest.mark.parametrize('method', METHOD_NAMES)
+def test_wetbulb_matches_scalar(method):
+    T, Td, P = _points(method)
+    T_w, rh, _, status = calculate_wetbulb_array(Td, T, Td, P, method, min_iter=MIN_ITER_LEGACY)
+    for i in range(len(T)):
+        item = calculate_wetbulb(Td[i], T[i], Td[i], P[i], formulas=[method]).methods[0]
+        assert status[i] == item.status
+        if item.status == STATUS_OK:
+            assert T_w[i] == pytest.approx(item.value1, abs=1e-12)
+            assert rh[i] == pytest.approx(item.rh, abs=1e-12)
+        else:
+            assert np.isnan(T_w[i])
+
+@pytest.mark.parametrize('method', ['Goff-水面', 'Buck-水面', 'Goff-冰面', 'Marti-冰面'])
+def test_both_matches_scalar(method):
+    T, _, P = _points(method)
+    rh = np.random.default_rng(7).uniform(5.0, 100.0, len(T))
+    T_d, T_w, _, status = calculate_both_array(None, T, rh, P, method, min_iter=MIN_ITER_LEGACY)
+    for i in range(len(T)):
+        item = calculate_both(None, T[i], rh[i], P[i], formulas=[method]).methods[0]
+        assert status[i] == (item.status if item.status != STATUS_OK else item.status2)
+        if item.status == STATUS_OK:
+            assert T_d[i] == pytest.approx(item.value1, abs=1e-9)
+            if item.status2 == STATUS_OK:
+                assert T_w[i] == pytest.approx(item.value2, abs=1e-12)
+
+@pytest.mark.parametrize('method', METHOD_NAMES)
+def test_esat_matches_scalar(method):
+    T = np.linspace(*METHOD_RANGES[method], 37)
+    assert calculate_esat_array(T, method) == pytest.approx([calculate_esat(x, method) for x in T], rel=1e-12)
+    assert calculate_dedt_array(T, method) == pytest.approx([calculate_dedt(x, method) for x in T], rel=1e-5)
+
+@pytest.mark.parametrize('method', METHOD_NAMES)
+def test_dewpoint_matches_scalar(method):
+    T, Tw, P = _points(method)
+    T_d, rh, _, status = calculate_dewpoint_array(T, Tw, P, method)
+    for i in range(len(T)):
+        item = calculate_dewpoint(T[i], Tw[i], P[i], formulas=[method]).methods[0]
+        assert status[i] == item.status
+        if item.status == STATUS_OK:
+            assert T_d[i] == pytest.approx(item.value1, abs=1e-9)
+            assert rh[i] == pytest.approx(item.rh, abs=1e-12)
+
+@pytest.mark.parametrize('method', METHOD_NAMES)
+def test_esat_inverse(method):
+    # 反解温度与原温度一致，标量与数组版相同
+    T = np.linspace(*METHOD_RANGES[method], 41)
+    e = calculate_esat_array(T, method)
+    T_d, iterations = esat_inverse_array(e, method)
+    assert T_d == pytest.approx(T, abs=1e-6)
+    assert iterations.max() < 50
+    assert [esat_calculate(x, method, 50, 1e-6) for x in e] == pytest.approx(T_d, abs=1e-9)
+
+@pytest.mark.parametrize('strategy', [GUESS_TD, GUESS_T_MINUS_N, GUESS_STULL])
+def test_guess_strategies_reach_same_root(samples, strategy):
+    T, Td, P = samples
+    reference, _, _, _ = calculate_wetbulb_array(Td, T, Td, P, tol=1e-12)
+    guess = initial_guess(strategy, T, Td)
+    T_w, _, iterations, status = calculate_wetbulb_array(guess, T, Td, P)
+    assert (status == STATUS_OK).all()
+    assert T_w == pytest.approx(reference, abs=1e-8)
+    for i in range(0, len(T), 30):
+        scalar = initial_guess(strategy, float(T[i]), float(Td[i]))
+        assert guess[i] == pytest.approx(scalar, abs=1e-12)
+
+def test_stull_needs_fewer_iterations(samples):
+    T, Td, P = samples
+    _, _, td_iterations, _ = calculate_wetbulb_array(Td, T, Td, P)
+    _, _, stull_iterations, _ = calculate_wetbulb_array(initial_guess(GUESS_STULL, T, Td), T, Td, P)
+    assert stull_iterations.mean() < td_iterations.mean()
+
+def test_stopping_rules(samples):
+    # 默认收敛即停；min_iter为旧版下限；ftol在残差足够小时提前停止，结果仍在容差内
+    T, Td, P = samples
+    legacy, _, legacy_iterations, _ = calculate_wetbulb_array(Td, T, Td, P, min_iter=MIN_ITER_LEGACY)
+    T_w, _, iterations, _ = calculate_wetbulb_array(Td, T, Td, P)
+    assert (legacy_iterations >= MIN_ITER_LEGACY).all()
+    assert iterations.mean() < legacy_iterations.mean()
+    assert T_w == pytest.approx(legacy, abs=1e-9)
+    loose, _, loose_iterations, status = calculate_wetbulb_array(Td, T, Td, P, ftol=1e-3)
+    assert (status == STATUS_OK).all()
+    assert (loose_iterations <= iterations).all()
+    assert loose == pytest.approx(legacy, abs=2e-3)  # 残差1e-3hPa，df/dT约0.5以上
+
+@pytest.mark.parametrize('method', METHOD_NAMES)
+def test_bracket_handles_any_guess(method):
+    # 适用范围内的任意初值（多在[Td,T]之外）都收敛到同一个根，且在[Td,T]之内
+    lo, hi = METHOD_RANGES[method]
+    rng = np.random.default_rng(11)
+    T = rng.uniform(max(lo, -120) + 1, min(hi, 60), 200)
+    Td = np.maximum(T - rng.uniform(0.0, 30.0, 200), lo)
+    P = rng.uniform(300.0, 1050.0, 200)
+    reference, _, _, ref_status = calculate_wetbulb_array(Td, T, Td, P, method, tol=1e-12)
+    guess = rng.uniform(lo, hi, 200)
+    stats = {}
+    T_w, _, iterations, status = calculate_wetbulb_array(guess, T, Td, P, method, stats=stats)
+    ok = ref_status == STATUS_OK
+    assert (status[ok] == STATUS_OK).all()
+    assert T_w[ok] == pytest.approx(reference[ok], abs=1e-8)
+    assert ((T_w[ok] >= Td[ok] - 1e-9) & (T_w[ok] <= T[ok] + 1e-9)).all()
+    assert iterations.max() <= 20
+    assert stats['fallbacks'] >= 0
+    for i in range(0, 200, 40):
+        item = calculate_wetbulb(guess[i], T[i], Td[i], P[i], formulas=[method]).methods[0]
+        if ok[i]:
+            assert item.status == STATUS_OK
+            assert item.value1 == pytest.approx(reference[i], abs=1e-8)
+
+@pytest.mark.parametrize('method, T, Td, expected', [
+    ('Tetens-水面', 54.85, 54.71, STATUS_OK),                 # 初值T-5在适用范围内，露点已超出
+    ('Buck-水面', 2.94, 0.68, STATUS_NOT_APPLICABLE),         # 露点在适用范围内，初值T-5已超出
+    ('Magnus-水面', 2.94, 0.68, STATUS_NOT_APPLICABLE),
+])
+def test_applicability_follows_unclipped_guess(method, T, Td, expected):
+    # 是否适用按给定的初值判断，初值限制到[Td,T]只影响迭代的起点
+    guess = initial_guess(GUESS_T_MINUS_N, T, Td)
+    item = calculate_wetbulb(guess, T, Td, 1013.25, formulas=[method]).methods[0]
+    _, _, _, status = calculate_wetbulb_array(np.array([guess]), T, Td, 1013.25, method)
+    assert item.status == status[0] == expected
@@ -0,0 +1,36 @@
+# 湿球计算核心库：不依赖任何图形界面，可在服务器与工作进程中直接导入
+# 标量接口只依赖标准库；数组接口（numpy）在首次访问时才加载
+from .formulas import (MAGNUS_FORMULAS, GOFF_FORMULAS, WEXLER_FORMULAS, METHOD_RANGES,
+                       methods, METHOD_NAMES, METHOD_IDS, select_methods,
+                       calculate_esat, calculate_dedt, esat_calculate)
+from .solver import (STATUS_OK, STATUS_NOT_APPLICABLE, STATUS_UNPHYSICAL, STATUS_RESIDUAL,
+                     STATUS_NOT_CONVERGED, STATUS_OVERFLOW, STATUS_FAILED, STATUS_MESSAGES,
+                     MODE_DEWPOINT, MODE_WETBULB, MODE_RH, GUESS_TD, GUESS_T_MINUS_N, GUESS_STULL,
+                     GUESS_PREVIOUS, MIN_ITER_LEGACY, initial_guess,
+                     MethodResult, CalculatorMemory, calculate_wetbulb, calculate_dewpoint, calculate_both)
+from .units import to_celsius, from_celsius, to_hpa, from_hpa
+from .derived import derived_parameters
+from .cache import SolveCache, solve_cached
+
+__version__ = "1.2.0"
+
+_LAZY = {
+    'calculate_esat_array': 'vector',
+    'calculate_dedt_array': 'vector',
+    'esat_inverse_array': 'vector',
+    'calculate_wetbulb_array': 'vector',
+    'calculate_dewpoint_array': 'vector',
+    'calculate_both_array': 'vector',
+    'wetbulb_lookup': 'grid',
+    'derived_parameters_array': 'derived_vector',
+    'ensemble_solve': 'ensemble',
+    'profile_solve': 'profile',
+    'solve_fields': 'fields',
+}
+
+def __getattr__(name):
+    if name in _LAZY:
+        import importlib
+        module = importlib.import_module(f'.{_LAZY[name]}', __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
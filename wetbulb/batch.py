@@ -0,0 +1,500 @@
+# 批量计算：与界面无关，可在后台线程、子进程或命令行中运行
+import os
+import time
+import collections
+
+import numpy as np
+
+from .cache import SolveCache
+from .derived import DERIVED_PARAMETERS, UNIT_TEMPERATURE, UNIT_PRESSURE, select_derived
+from .derived_vector import derived_parameters_array
+from .ensemble import STAT_LABELS, ensemble_solve
+from .formulas import METHOD_IDS, select_methods
+from .solver import (STATUS_OK, GUESS_TD, GUESS_STULL, GUESS_PREVIOUS, MODE_DEWPOINT, MODE_WETBULB, MODE_RH,
+                     MIN_ITER_LEGACY, initial_guess)
+from .sheets import SheetReader, SheetWriter, is_csv
+from .units import to_celsius, from_celsius, to_hpa, from_hpa
+from .vector import calculate_wetbulb_array, calculate_dewpoint_array, calculate_both_array
+
+WARM_STRIDE = 16  # 沿用相邻行的解时，每隔多少行先单独求解一行
+
+INPUT_LABELS = {
+    MODE_DEWPOINT: '露点温度',
+    MODE_WETBULB: '湿球温度',
+    MODE_RH: '相对湿度',
+}
+
+class BatchCancelled(Exception):
+    pass
+
+class BatchStats:
+    def __init__(self, rows, seconds, output_path, workers=1, failed_chunks=0, cache_hits=0, cache_misses=0,
+                 solved_rows=None, store_hits=0, iterations=0, solves=0, saved=0, fallbacks=0):
+        self.rows = rows
+        self.solved_rows = rows if solved_rows is None else solved_rows  # 去重后实际求解的行数
+        self.seconds = seconds
+        self.output_path = output_path
+        self.workers = workers
+        self.failed_chunks = failed_chunks
+        self.cache_hits = cache_hits
+        self.cache_misses = cache_misses
+        self.store_hits = store_hits  # 直接从结果库取得的行数
+        self.iterations = iterations  # 全部迭代求解的迭代次数之和（含沿用相邻解时先求解的行）
+        self.solves = solves  # 迭代求解的次数（行数×公式数）
+        self.saved = saved  # 与旧版至少迭代MIN_ITER_LEGACY次相比少做的湿球迭代次数
+        self.fallbacks = fallbacks  # 湿球牛顿步越出[Td,T]而改用试位/二分的次数
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds > 0 else float('inf')
+
+    @property
+    def dedup_ratio(self):
+        # 因与同块中其他行完全相同而免于求解的行所占比例（不含结果库命中的行）
+        rows = self.rows - self.store_hits
+        return 1 - self.solved_rows / rows if rows else 0.0
+
+    @property
+    def mean_iterations(self):
+        return self.iterations / self.solves if self.solves else 0.0
+
+    def summary(self):
+        text = f"{self.rows} 行，用时 {self.seconds:.2f} 秒（{self.rows_per_second:.0f} 行/秒，{self.workers} 个进程）"
+        if self.store_hits:
+            text += f"，结果库命中 {self.store_hits} 行"
+        if self.solved_rows < self.rows - self.store_hits:
+            text += f"，去重后求解 {self.solved_rows} 行"
+        if self.solves:
+            text += f"，平均迭代 {self.mean_iterations:.2f} 次"
+        if self.saved:
+            text += f"，较旧版少迭代 {self.saved} 次（每次求一次e_sat与de/dT）"
+        if self.fallbacks:
+            text += f"，区间回退 {self.fallbacks} 次"
+        if self.cache_hits + self.cache_misses:
+            text += f"，缓存命中率 {self.cache_hits / (self.cache_hits + self.cache_misses):.1%}"
+        if self.failed_chunks:
+            text += f"，{self.failed_chunks} 个数据块计算失败"
+        return text
+
+def _derived_label(name, temperature_unit, pressure_unit):
+    label, unit = DERIVED_PARAMETERS[name]
+    return label + {UNIT_TEMPERATURE: temperature_unit, UNIT_PRESSURE: pressure_unit}.get(unit, unit)
+
+def _result_names(mode):
+    if mode == MODE_DEWPOINT:
+        return ['湿球']
+    if mode == MODE_WETBULB:
+        return ['露点']
+    return ['露点', '湿球']
+
+def output_columns(mode, temperature_unit='℃', formulas=None, derived=None, pressure_unit='hPa', ensemble=False):
+    # formulas为None时输出Goff公式（按干球温度选水面/冰面）的结果，否则每个公式各占一组列
+    # derived给出时每组结果之后追加所选的扩展气象参数
+    # ensemble为True时最后追加所选公式（未选时为全部公式）之间的统计列
+    columns = [f'{name}{temperature_unit}' for name in _result_names(mode)]
+    if derived:
+        columns += [_derived_label(name, temperature_unit, pressure_unit) for name in select_derived(derived)]
+    if formulas is not None:
+        columns = [f'{column}({formula})' for formula, _ in select_methods(formulas) for column in columns]
+    if ensemble:
+        columns += [f'{name}{"" if stat == "count" else temperature_unit}({label})'
+                    for name in _result_names(mode) for stat, label in STAT_LABELS.items()]
+    return columns
+
+def _saved_iterations(iterations, status):
+    # 湿球迭代中收敛的元素按旧版至少迭代MIN_ITER_LEGACY次计算可省下的迭代次数
+    return int(np.maximum(MIN_ITER_LEGACY - iterations[status == STATUS_OK], 0).sum())
+
+def _warm_start(mode, T, X, P, method, tol, backend, stats, min_iter=0, ftol=None):
+    # 按时间排列的数据相邻行的解相近：每隔WARM_STRIDE行先以Stull估计为初值求解一行，
+    # 其余各行以其前最近一个已求解行的湿球温度加上两行Stull估计之差为初值；X为露点或相对湿度百分比
+    if mode == MODE_DEWPOINT:
+        seed = initial_guess(GUESS_STULL, T, X)
+    else:
+        seed = initial_guess(GUESS_STULL, T, None, rh=X)
+    anchors = np.arange(0, len(T), WARM_STRIDE)
+    sub = method if isinstance(method, str) else method[anchors]
+    if mode == MODE_DEWPOINT:
+        T_w, _, iterations, status = calculate_wetbulb_array(seed[anchors], T[anchors], X[anchors], P[anchors], sub,
+                                                             tol=tol, backend=backend, min_iter=min_iter, ftol=ftol,
+                                                             stats=stats)
+    else:
+        _, T_w, iterations, status = calculate_both_array(seed[anchors], T[anchors], X[anchors], P[anchors], sub,
+                                                          tol=tol, backend=backend, min_iter=min_iter, ftol=ftol,
+                                                          stats=stats)
+    if stats is not None:
+        stats['iterations'] += int(iterations.sum())
+        stats['saved'] += _saved_iterations(iterations, status)
+    nearest = np.arange(len(T)) // WARM_STRIDE
+    guess = T_w[nearest] + seed - seed[anchors][nearest]
+    return np.where(np.isfinite(guess), guess, seed)
+
+def _solve(mode, T, B, P, method, temperature_unit, pressure_unit, guess_strategy, tol, backend, derived, stats=None,
+           min_iter=0, ftol=None):
+    # stats给出时累加迭代次数、迭代求解的次数与较旧版少做的迭代次数
+    # min_iter、ftol为湿球迭代的停止条件，见solver.MIN_ITER_LEGACY
+    if mode == MODE_DEWPOINT:
+        Td = to_celsius(B, temperature_unit)
+        if guess_strategy == GUESS_PREVIOUS:
+            guess = _warm_start(mode, T, Td, P, method, tol, backend, stats, min_iter, ftol)
+        else:
+            guess = initial_guess(guess_strategy, T, Td)
+        T_w, rh, iterations, status = calculate_wetbulb_array(guess, T, Td, P, method, tol=tol, backend=backend,
+                                                              min_iter=min_iter, ftol=ftol, stats=stats)
+        results = [T_w]
+    elif mode == MODE_WETBULB:
+        T_w = to_celsius(B, temperature_unit)
+        Td, rh, iterations, status = calculate_dewpoint_array(T, T_w, P, method, tol=tol, backend=backend)
+        results = [Td]
+    elif mode == MODE_RH:
+        # Tw=Td策略下以反解出的露点作为初值
+        if guess_strategy == GUESS_PREVIOUS:
+            guess = _warm_start(mode, T, B, P, method, tol, backend, stats, min_iter, ftol)
+        else:
+            guess = initial_guess(guess_strategy, T, None, rh=B)
+        Td, T_w, iterations, status = calculate_both_array(guess, T, B, P, method, tol=tol, backend=backend,
+                                                           min_iter=min_iter, ftol=ftol, stats=stats)
+        rh = B / 100
+        results = [Td, T_w]
+    else:
+        raise ValueError("无效的计算模式")
+    if stats is not None:
+        stats['iterations'] += int(iterations.sum())
+        stats['solves'] += int(np.count_nonzero(iterations))  # 不适用等未进入迭代的元素不计
+        if mode != MODE_WETBULB:  # 求露点的反解没有迭代下限
+            stats['saved'] += _saved_iterations(iterations, status)
+
+    results = [from_celsius(values, temperature_unit) for values in results]
+    if derived:
+        values = derived_parameters_array(method, T, Td, T_w, rh, P, derived)
+        for name, column in values.items():
+            unit = DERIVED_PARAMETERS[name][1]
+            if unit == UNIT_TEMPERATURE:
+                column = from_celsius(column, temperature_unit)
+            elif unit == UNIT_PRESSURE:
+                column = from_hpa(column, pressure_unit)
+            elif unit == '%':
+                column = column * 100
+            results.append(np.array(column, dtype=float))
+    failed = status != STATUS_OK
+    for values in results:
+        values[failed] = np.nan
+    return results
+
+def _ensemble_columns(mode, T, B, P, formulas, temperature_unit, guess_strategy, tol, backend, min_iter, ftol):
+    # 所选公式各自整列求解后沿公式轴求统计量；标准差与极差是温差，只按单位缩放
+    X = B if mode == MODE_RH else to_celsius(B, temperature_unit)
+    result = ensemble_solve(mode, T, X, P, formulas, guess_strategy=guess_strategy, tol=tol, backend=backend,
+                            min_iter=min_iter, ftol=ftol)
+    scale = from_celsius(1.0, temperature_unit) - from_celsius(0.0, temperature_unit)
+    columns = []
+    for name in (['Tw'] if mode == MODE_DEWPOINT else ['Td'] if mode == MODE_WETBULB else ['Td', 'Tw']):
+        stats = result.stats(name)
+        for stat in STAT_LABELS:
+            values = stats[stat]
+            if stat in ('std', 'spread'):
+                values = values * scale
+            elif stat == 'count':
+                values = np.where(values > 0, values, np.nan)  # 没有公式求解成功的行与其他失败结果一样留空
+            else:
+                values = from_celsius(values, temperature_unit)
+            columns.append(values)
+    return columns
+
+def solve_rows(mode, A, B, C, temperature_unit='℃', pressure_unit='hPa', guess_strategy=GUESS_TD,
+               formulas=None, tol=1e-6, backend='exact', derived=None, cache=None, ensemble=False, stats=None,
+               min_iter=0, ftol=None):
+    # 对一组输入行整体求解，返回与output_columns对应的结果数组（用户单位，失败为nan）
+    # 只计算所选公式，每个公式整列求解一次；给出cache（SolveCache）时只求解未命中的行
+    # stats为字典时在其'iterations'、'solves'、'saved'、'fallbacks'中累加迭代次数、迭代求解的次数、
+    # 较旧版少做的迭代次数与湿球迭代的区间回退次数
+    # min_iter=MIN_ITER_LEGACY且ftol为None时与旧版结果逐位一致
+    if cache is not None:
+        return _solve_rows_cached(cache, mode, A, B, C, temperature_unit, pressure_unit, guess_strategy,
+                                  formulas, tol, backend, derived, ensemble, stats, min_iter, ftol)
+    T = to_celsius(np.asarray(A, dtype=float), temperature_unit)
+    P = to_hpa(np.asarray(C, dtype=float), pressure_unit)
+    B = np.asarray(B, dtype=float)
+    if formulas is None:
+        method = np.where(T >= 0, METHOD_IDS['Goff-水面'], METHOD_IDS['Goff-冰面'])
+        results = _solve(mode, T, B, P, method, temperature_unit, pressure_unit, guess_strategy, tol, backend,
+                         derived, stats, min_iter, ftol)
+    else:
+        results = []
+        for formula, _ in select_methods(formulas):
+            results += _solve(mode, T, B, P, formula, temperature_unit, pressure_unit, guess_strategy, tol, backend,
+                              derived, stats, min_iter, ftol)
+    if ensemble:
+        results += _ensemble_columns(mode, T, B, P, formulas, temperature_unit, guess_strategy, tol, backend,
+                                     min_iter, ftol)
+    return results
+
+def _result_options(temperature_unit, pressure_unit, guess_strategy, formulas, tol, backend, derived, ensemble,
+                    min_iter, ftol):
+    # 决定一行输出结果的全部选项，用作缓存与结果库的键
+    return (temperature_unit, pressure_unit, guess_strategy,
+            None if formulas is None else tuple(name for name, _ in select_methods(formulas)), tol, backend,
+            tuple(select_derived(derived)) if derived else None, ensemble, min_iter, ftol)
+
+def _solve_rows_cached(cache, mode, A, B, C, temperature_unit, pressure_unit, guess_strategy, formulas, tol, backend,
+                       derived, ensemble, stats, min_iter, ftol):
+    # 缓存的值为一行的全部结果列；含nan的行不参与缓存
+    A, B, C = (np.asarray(values, dtype=float) for values in (A, B, C))
+    results = np.full((len(output_columns(mode, temperature_unit, formulas, derived, ensemble=ensemble)), len(A)),
+                      np.nan)
+    options = _result_options(temperature_unit, pressure_unit, guess_strategy, formulas, tol, backend, derived,
+                              ensemble, min_iter, ftol)
+    rows = np.flatnonzero(np.isfinite(A) & np.isfinite(B) & np.isfinite(C))
+    quantized = np.rint(np.column_stack((A[rows], B[rows], C[rows])) / cache.resolution).astype(np.int64)
+    keys = [(mode, tuple(inputs)) + options for inputs in quantized.tolist()]
+    values = cache.get_many(keys)
+    found = [i for i, value in enumerate(values) if value is not None]
+    if found:
+        results[:, rows[found]] = np.array([values[i] for i in found]).T
+    if len(found) < len(rows):
+        missing = [i for i, value in enumerate(values) if value is None]
+        index = rows[missing]
+        solved = np.array(solve_rows(mode, A[index], B[index], C[index], temperature_unit, pressure_unit,
+                                     guess_strategy, formulas, tol, backend, derived, ensemble=ensemble,
+                                     stats=stats, min_iter=min_iter, ftol=ftol))
+        results[:, index] = solved
+        cache.put_many(zip([keys[i] for i in missing], solved.T.tolist()))
+    return list(results)
+
+def _to_float(values):
+    # 无法解析的单元格记为nan：空单元格先按掩码跳过，其余整列一次转换；
+    # 含文字等无法整列转换的单元格时才逐个解析
+    column = np.asarray(values, dtype=object).ravel()
+    out = np.full(len(column), np.nan)
+    filled = (column != None) & (column != '')  # 逐元素比较
+    try:
+        out[filled] = column[filled].astype(float)
+    except (TypeError, ValueError):
+        out[filled] = _parse_float(column[filled]).astype(float)
+    return out
+
+def _cell_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+_parse_float = np.frompyfunc(_cell_float, 1, 1)
+
+def _output_layout(header, columns, mode, temperature_unit, pressure_unit):
+    # 输入的ABC列加上单位信息，结果依次写入D列起的各列（不存在时追加到末尾）
+    out_header = list(header)
+    labels = {
+        'A': f'干球{temperature_unit}',
+        'B': f'{INPUT_LABELS[mode]}{temperature_unit if mode != MODE_RH else "%"}',
+        'C': f'大气{pressure_unit}',
+    }
+    for i, name in enumerate(out_header):
+        out_header[i] = labels.get(name, name)
+    slots = []
+    for i, name in enumerate(columns):
+        column = chr(ord('D') + i) if i < 23 else None
+        if column in header:
+            slot = header.index(column)
+            out_header[slot] = name
+        else:
+            slot = len(out_header)
+            out_header.append(name)
+        slots.append(slot)
+    return out_header, slots
+
+def _merge_rows(rows, width, slots, results):
+    # 输入行与结果列拼成二维数组后按列下标整体写入结果，nan写为空单元格
+    lengths = np.fromiter(map(len, rows), dtype=np.intp, count=len(rows))
+    merged = np.full((len(rows), width), None, dtype=object)
+    for length in np.unique(lengths):
+        index = np.flatnonzero(lengths == length)
+        cells = np.empty((len(index), length), dtype=object)
+        cells[:] = rows if len(index) == len(rows) else [rows[i] for i in index]
+        merged[index, :min(length, width)] = cells[:, :width]
+    values = np.array(results, dtype=float).reshape(len(slots), len(rows))
+    cells = values.astype(object)
+    cells[np.isnan(values)] = None
+    merged[:, slots] = cells.T
+    merged = merged.tolist()
+    for i in np.flatnonzero(lengths > width):  # 比表头更长的行保留多出的单元格
+        merged[i] += rows[i][width:]
+    return merged
+
+_caches = {}
+
+def _process_cache(size):
+    # 每个进程各自保留一个缓存，跨数据块（以及同一进程中的多次批量计算）复用
+    if not size:
+        return None
+    if size not in _caches:
+        _caches[size] = SolveCache(size)
+    return _caches[size]
+
+def _unique_rows(A, B, C):
+    # 按字节比较找出完全相同的输入行，返回各列的唯一值与还原到原行序的下标
+    # 唯一值按首次出现的顺序排列，保持数据原有的时间顺序（沿用相邻行的解时需要）
+    rows = np.ascontiguousarray(np.column_stack((A, B, C)))
+    keys = rows.view(np.dtype((np.void, rows.itemsize * 3))).ravel()
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    rank = np.empty(len(order), dtype=np.intp)
+    rank[order] = np.arange(len(order))
+    first = first[order]
+    return A[first], B[first], C[first], rank[inverse.ravel()]
+
+def _solve_chunk(mode, A, B, C, temperature_unit, pressure_unit, guess_strategy, formulas, tol, backend, derived,
+                 ensemble, cache_size, dedup, min_iter, ftol):
+    # 单个数据块出错时只影响该块：结果记为nan并返回错误信息
+    # 同时返回本块实际求解的行数（去重后）、缓存命中与未命中次数以及迭代统计
+    cache = _process_cache(cache_size)
+    stats = {'iterations': 0, 'solves': 0, 'saved': 0, 'fallbacks': 0}
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    n_rows = len(A)
+    inverse = None
+    try:
+        if dedup:
+            U, V, W, index = _unique_rows(A, B, C)
+            if len(U) < n_rows:
+                A, B, C, inverse = U, V, W, index
+        results = solve_rows(mode, A, B, C, temperature_unit, pressure_unit, guess_strategy, formulas, tol, backend,
+                             derived, cache, ensemble, stats, min_iter, ftol)
+        if inverse is not None:
+            results = [values[inverse] for values in results]
+        error = None
+    except Exception as e:
+        n_columns = len(output_columns(mode, temperature_unit, formulas, derived, ensemble=ensemble))
+        results, error = [np.full(n_rows, np.nan) for _ in range(n_columns)], str(e)
+    if cache is not None:
+        hits, misses = cache.hits - hits, cache.misses - misses
+    return results, error, len(A), hits, misses, stats
+
+def run_batch(input_path, output_path, mode, temperature_unit='℃', pressure_unit='hPa',
+              guess_strategy=GUESS_TD, formulas=None, tol=1e-6, backend='exact', derived=None, ensemble=False,
+              chunk_size=10000, workers=1, cache_size=0, dedup=True, store_path=None, min_iter=0, ftol=None,
+              progress=None, cancel=None, progress_interval=0.2):
+    # 流式读取xlsx/csv，逐块数组求解并立即写出，内存占用与总行数无关
+    # workers>1时数据块按读取顺序分发到进程池，并按原顺序写回；同时在途的块不超过2*workers
+    # progress(已完成行数, 总行数, 行/秒, 预计剩余秒数)按progress_interval节流调用
+    # cancel()返回True时抛出BatchCancelled，不留下结果文件
+    # derived为扩展气象参数名列表（或'all'），在每组结果后追加对应的列
+    # ensemble为True时追加各公式结果之间的均值、标准差、最小值、最大值、极差与有效公式数
+    # dedup为True时每个数据块中完全相同的输入行只求解一次，结果再分发回各行
+    # cache_size>0时每个进程用一个该容量的SolveCache，重复出现的输入行不再求解
+    # store_path给出时使用该SQLite结果库：先查库，只求解库中没有的行，每块的新结果在一个事务中写入库
+    # （结果库只在主进程中读写）
+    # min_iter为湿球迭代的最少次数，默认0（收敛即停止）；ftol给出时残差|f|（hPa）小于它也停止；
+    # min_iter=MIN_ITER_LEGACY时与旧版结果逐位一致，完成时报告较旧版少做的迭代次数
+    start = time.perf_counter()
+    columns = output_columns(mode, temperature_unit, formulas, derived, pressure_unit, ensemble)
+    part_path = output_path + '.part'
+    options = (temperature_unit, pressure_unit, guess_strategy, formulas, tol, backend, derived, ensemble, cache_size,
+               dedup, min_iter, ftol)
+    store = option_id = None
+    if store_path:
+        from .store import ResultStore
+        store = ResultStore(store_path)
+        option_id = store.option_id(mode, _result_options(temperature_unit, pressure_unit, guess_strategy, formulas,
+                                                          tol, backend, derived, ensemble, min_iter, ftol),
+                                    len(columns))
+    executor = None
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(workers)
+    pending = collections.deque()
+    max_pending = 2 * workers if executor is not None else 1
+    done = 0
+    solved_rows = 0
+    failed_chunks = 0
+    cache_hits = cache_misses = 0
+    store_hits = 0
+    iterations = {'iterations': 0, 'solves': 0, 'saved': 0, 'fallbacks': 0}
+    last_report = start
+
+    with SheetReader(input_path, chunk_size) as reader:
+        header = reader.header
+        if 'A' not in header or 'B' not in header or 'C' not in header:
+            raise ValueError("Excel文件必须包含ABC列！")
+        a, b, c = (header.index(column) for column in 'ABC')
+        out_header, slots = _output_layout(header, columns, mode, temperature_unit, pressure_unit)
+
+        def write_oldest():
+            nonlocal done, solved_rows, failed_chunks, cache_hits, cache_misses, last_report
+            rows, job, stored = pending.popleft()
+            results, error, solved, hits, misses, stats = job if isinstance(job, tuple) else job.result()
+            solved_rows += solved
+            for key in iterations:
+                iterations[key] += stats[key]
+            if error is not None:
+                failed_chunks += 1
+            if stored is not None:
+                values, missing, inputs = stored
+                if len(missing):
+                    values[:, missing] = results
+                    if error is None:
+                        store.put_many(option_id, *inputs, values[:, missing])
+                results = list(values)
+            cache_hits += hits
+            cache_misses += misses
+            writer.write_rows(_merge_rows(rows, len(out_header), slots, results))
+            done += len(rows)
+
+            now = time.perf_counter()
+            if progress is not None and now - last_report >= progress_interval:
+                total = max(reader.total_rows or 0, done)
+                rate = done / (now - start) if now > start else 0.0
+                eta = (total - done) / rate if rate > 0 else 0.0
+                progress(done, total, rate, eta)
+                last_report = now
+
+        writer = SheetWriter(part_path, csv_format=is_csv(output_path))
+        try:
+            writer.write_rows([out_header])
+            for rows in reader.chunks():
+                if cancel is not None and cancel():
+                    raise BatchCancelled()
+                A = _to_float([row[a] for row in rows])
+                B = _to_float([row[b] for row in rows])
+                C = _to_float([row[c] for row in rows])
+                stored = None
+                if store is not None:
+                    values, found = store.get_many(option_id, A, B, C, len(columns))
+                    store_hits += int(found.sum())
+                    missing = np.flatnonzero(~found)
+                    A, B, C = A[missing], B[missing], C[missing]
+                    stored = (values, missing, (A, B, C))
+                if not len(A):
+                    job = ([], None, 0, 0, 0, dict.fromkeys(iterations, 0))  # 整块都在结果库中
+                elif executor is not None:
+                    job = executor.submit(_solve_chunk, mode, A, B, C, *options)
+                else:
+                    job = _solve_chunk(mode, A, B, C, *options)
+                pending.append((rows, job, stored))
+                while len(pending) >= max_pending:
+                    write_oldest()
+            while pending:
+                if cancel is not None and cancel():
+                    raise BatchCancelled()
+                write_oldest()
+            writer.close()
+            os.replace(part_path, output_path)
+        except BaseException:
+            for _, job, _ in pending:
+                if not isinstance(job, tuple):
+                    job.cancel()
+            writer.close()
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            if store is not None:
+                store.close()
+
+    seconds = time.perf_counter() - start
+    if progress is not None:
+        progress(done, done, done / seconds if seconds > 0 else 0.0, 0.0)
+    return BatchStats(done, seconds, output_path, workers, failed_chunks, cache_hits, cache_misses, solved_rows,
+                      store_hits, iterations['iterations'], iterations['solves'], iterations['saved'],
+                      iterations['fallbacks'])
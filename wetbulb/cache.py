@@ -0,0 +1,113 @@
+# 求解结果缓存：传感器按0.1℃/0.1hPa上报，同一组输入会反复出现，命中时直接返回上次的结果
+# 输入按resolution取整后作为键（默认1e-6，只消除单位换算带来的浮点误差，不影响结果），
+# 键中还包含计算模式、公式、迭代精度等全部选项；超过maxsize时淘汰最久未使用的条目
+import collections
+import threading
+
+from .solver import MODE_DEWPOINT, MODE_WETBULB, MODE_RH, calculate_wetbulb, calculate_dewpoint, calculate_both
+
+DEFAULT_SIZE = 4096
+DEFAULT_RESOLUTION = 1e-6
+
+class SolveCache:
+    def __init__(self, maxsize=DEFAULT_SIZE, resolution=DEFAULT_RESOLUTION):
+        if maxsize < 0:
+            raise ValueError("缓存容量不能为负数")
+        self.maxsize = maxsize
+        self.resolution = resolution
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def quantize(self, value):
+        return None if value is None else round(value / self.resolution)
+
+    def key(self, mode, inputs, *options):
+        return (mode, tuple(self.quantize(value) for value in inputs)) + options
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get_many(self, keys):
+        # 批量查找，未命中的位置为None；整批只加锁一次
+        values = []
+        with self._lock:
+            data = self._data
+            for key in keys:
+                value = data.get(key)
+                if value is not None:
+                    data.move_to_end(key)
+                values.append(value)
+            hits = len(values) - values.count(None)
+            self.hits += hits
+            self.misses += len(values) - hits
+        return values
+
+    def put_many(self, items):
+        if not self.maxsize:
+            return
+        with self._lock:
+            data = self._data
+            for key, value in items:
+                data[key] = value
+                data.move_to_end(key)
+            while len(data) > self.maxsize:
+                data.popitem(last=False)
+                self.evictions += 1
+
+    def put(self, key, value):
+        if not self.maxsize:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def summary(self):
+        return f"缓存命中 {self.hits}/{self.hits + self.misses}（{self.hit_rate:.1%}），{len(self)}/{self.maxsize} 条"
+
+def solve_cached(cache, mode, initial_guess, T, T_other, P, tol=1e-6, formulas=None, trace=False):
+    # 与界面三种输入模式对应的标量求解；返回的CalculatorMemory可能被多次复用，调用方不应修改
+    # trace为True时记录迭代过程（供收敛图使用）
+    if mode == MODE_WETBULB:
+        initial_guess = None  # 求露点不需要初值
+    if formulas is not None:
+        formulas = tuple([formulas] if isinstance(formulas, str) else formulas)
+    key = cache.key(mode, (initial_guess, T, T_other, P), tol, formulas, trace)
+    calculator = cache.get(key)
+    if calculator is None:
+        if mode == MODE_DEWPOINT:
+            calculator = calculate_wetbulb(initial_guess, T, T_other, P, tol=tol, formulas=formulas, trace=trace)
+        elif mode == MODE_WETBULB:
+            calculator = calculate_dewpoint(T, T_other, P, tol=tol, formulas=formulas, trace=trace)
+        elif mode == MODE_RH:
+            calculator = calculate_both(initial_guess, T, T_other, P, tol=tol, formulas=formulas, trace=trace)
+        else:
+            raise ValueError("无效的计算模式")
+        cache.put(key, calculator)
+    return calculator
@@ -0,0 +1,226 @@
+# 命令行入口：python -m wetbulb batch 输入文件 [-o 输出文件] ...
+# 不需要图形界面，可在无显示的服务器或定时任务中运行
+import argparse
+import os
+import sys
+import time
+
+from .solver import (MODE_DEWPOINT, MODE_WETBULB, MODE_RH, GUESS_TD, GUESS_T_MINUS_N, GUESS_STULL,
+                     GUESS_PREVIOUS)
+from .units import PRESSURE_UNITS
+from .vector import BACKENDS
+
+MODES = {'dew': MODE_DEWPOINT, 'wet': MODE_WETBULB, 'rh': MODE_RH}
+TEMPERATURE_UNITS = {'C': '℃', 'K': 'K', 'F': '℉', '℃': '℃', '℉': '℉'}
+GUESSES = {'td': GUESS_TD, 't-n': GUESS_T_MINUS_N, 'stull': GUESS_STULL, 'prev': GUESS_PREVIOUS}
+
+def default_output(input_path):
+    directory, name = os.path.split(input_path)
+    return os.path.join(directory, f"result_{name}")
+
+def parse_formulas(text):
+    if text is None or text == 'auto':
+        return None
+    return [name.strip() for name in text.split(',') if name.strip()]
+
+def parse_derived(text):
+    if not text:
+        return None
+    if text == 'all':
+        return 'all'
+    return [name.strip() for name in text.split(',') if name.strip()]
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m wetbulb', description='湿球计算器命令行工具')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    batch = commands.add_parser('batch', help='批量计算xlsx/csv文件（A列干球温度，B列露点/湿球/相对湿度，C列气压）')
+    batch.add_argument('input', help='输入文件（.xlsx或.csv）')
+    batch.add_argument('-o', '--output', help='输出文件，默认为输入目录下的result_<文件名>')
+    batch.add_argument('--mode', choices=MODES, default='dew',
+                       help='dew: 已知露点求湿球；wet: 已知湿球求露点；rh: 已知相对湿度求两者（默认dew）')
+    batch.add_argument('--temp-unit', choices=TEMPERATURE_UNITS, default='C', help='温度单位（默认C）')
+    batch.add_argument('--pressure-unit', choices=PRESSURE_UNITS, default='hPa', help='压强单位（默认hPa）')
+    batch.add_argument('--formulas', default='auto',
+                       help='逗号分隔的公式名，如"Goff-水面,Buck-水面"；auto按温度选择Goff公式（默认）')
+    batch.add_argument('--derived',
+                       help='逗号分隔的扩展气象参数名，追加在结果列之后，如"mixing_ratio,theta_e,t_lcl"；all为全部参数')
+    batch.add_argument('--ensemble', action='store_true',
+                       help='追加各公式结果之间的均值、标准差、最小值、最大值、极差与公式数（--formulas为auto时统计全部公式）')
+    batch.add_argument('--guess', choices=GUESSES, default='td',
+                       help='湿球迭代初值策略：td、t-n、stull经验公式、prev沿用相邻行的解（按时间排列的数据，默认td）')
+    batch.add_argument('--tol', type=float, default=1e-6, help='迭代精度（默认1e-6）')
+    batch.add_argument('--min-iter', type=int, default=0,
+                       help='湿球迭代的最少次数（默认0，收敛即停止）；设为5时与旧版结果逐位一致')
+    batch.add_argument('--ftol', type=float,
+                       help='残差|f|（hPa）小于该值时也停止湿球迭代，不再求导（默认只按步长判断）')
+    batch.add_argument('--backend', choices=BACKENDS, default='exact',
+                       help='e_sat计算后端：exact精确公式（默认）；table查表插值，相对误差<1e-9；'
+                            'poly分段多项式，相对误差<1e-10')
+    batch.add_argument('--workers', type=int, default=1, help='并行进程数（默认1）')
+    batch.add_argument('--chunk-size', type=int, default=10000, help='每个数据块的行数（默认10000）')
+    batch.add_argument('--no-dedup', action='store_true', help='不合并数据块中完全相同的输入行，逐行求解')
+    batch.add_argument('--cache-size', type=int, default=0,
+                       help='每个进程缓存的输入组合数，重复输入不再求解；输出多个公式时效果明显（默认0，不缓存）')
+    batch.add_argument('--store', metavar='PATH',
+                       help='SQLite结果库文件：先查库，只求解库中没有的输入行，新结果写入库中供以后复用')
+    batch.add_argument('--quiet', action='store_true', help='不输出进度')
+
+    profile = commands.add_parser('profile', help='批量计算探空廓线（A列廓线标识，B列气压，C列温度，D列露点）')
+    profile.add_argument('input', help='输入文件（.xlsx或.csv），同一条廓线的各层须相邻')
+    profile.add_argument('-o', '--output', help='输出文件，默认为输入目录下的result_<文件名>')
+    profile.add_argument('--temp-unit', choices=TEMPERATURE_UNITS, default='C', help='温度单位（默认C）')
+    profile.add_argument('--pressure-unit', choices=PRESSURE_UNITS, default='hPa', help='压强单位（默认hPa）')
+    profile.add_argument('--formula', default='auto', help='公式名；auto按各层温度选择Goff水面/冰面公式（默认）')
+    profile.add_argument('--g', type=float, help='重力加速度m/s²，用于测高公式（默认取cfg.json中的设置）')
+    profile.add_argument('--elevation', type=float, default=0.0,
+                         help='最低层的高度m；默认0，即输出离地高度')
+    profile.add_argument('--tol', type=float, default=1e-6, help='迭代精度（默认1e-6）')
+    profile.add_argument('--backend', choices=BACKENDS, default='exact', help='e_sat计算后端（默认exact）')
+    profile.add_argument('--chunk-size', type=int, default=10000, help='每个数据块的行数（默认10000）')
+
+    fields = commands.add_parser('fields', help='计算格点场（.npy文件，以内存映射逐块读写）')
+    fields.add_argument('temperature', help='温度场.npy')
+    fields.add_argument('humidity', help='露点/湿球/相对湿度(%%)场.npy，与温度场形状相同')
+    fields.add_argument('pressure', help='气压：常数，或可广播到温度场形状的.npy（如(层数,1,1)）')
+    fields.add_argument('-o', '--output-dir', default='.', help='输出目录，结果为<前缀>Tw.npy/Td.npy（默认当前目录）')
+    fields.add_argument('--prefix', default='', help='输出文件名前缀')
+    fields.add_argument('--mode', choices=MODES, default='dew', help='dew/wet/rh，与batch相同（默认dew）')
+    fields.add_argument('--temp-unit', choices=TEMPERATURE_UNITS, default='K', help='温度单位（默认K）')
+    fields.add_argument('--pressure-unit', choices=PRESSURE_UNITS, default='Pa', help='压强单位（默认Pa）')
+    fields.add_argument('--formula', default='auto', help='公式名；auto按温度选择Goff水面/冰面公式（默认）')
+    fields.add_argument('--guess', choices=GUESSES, default='td', help='湿球迭代初值策略（默认td）')
+    fields.add_argument('--tol', type=float, default=1e-6, help='迭代精度（默认1e-6）')
+    fields.add_argument('--backend', choices=BACKENDS, default='exact', help='e_sat计算后端（默认exact）')
+    fields.add_argument('--tile-size', type=int, default=1 << 20, help='每块的元素数，决定内存占用（默认1048576）')
+
+    grid = commands.add_parser('grid', help='预先建立湿球网格文件，供查表接口以内存映射方式共享')
+    grid.add_argument('--formulas', default='Goff-水面', help='逗号分隔的公式名，all为全部公式（默认Goff-水面）')
+    grid.add_argument('--step', type=float, default=1.0, help='干球与露点的网格步长℃（默认1）')
+    grid.add_argument('--p-step', type=float, default=25.0, help='气压的网格步长hPa（默认25）')
+
+    report = commands.add_parser('poly-report', help='拟合多项式后端并输出各公式的实测误差')
+    report.add_argument('--tol', type=float, default=1e-10, help='e_sat允许的最大相对误差（默认1e-10）')
+    report.add_argument('--formulas', default='auto', help='逗号分隔的公式名，auto为全部公式（默认）')
+    return parser
+
+def run_batch_command(args):
+    from .batch import run_batch
+
+    output = args.output or default_output(args.input)
+    last_line = [0.0]
+
+    def progress(done, total, rate, eta):
+        now = time.perf_counter()
+        if now - last_line[0] >= 1.0:
+            print(f"{done}/{total} 行  {rate:.0f} 行/秒  预计剩余 {eta:.1f} 秒", file=sys.stderr)
+            last_line[0] = now
+
+    stats = run_batch(
+        args.input, output, MODES[args.mode],
+        temperature_unit=TEMPERATURE_UNITS[args.temp_unit],
+        pressure_unit=args.pressure_unit,
+        guess_strategy=GUESSES[args.guess],
+        formulas=parse_formulas(args.formulas),
+        tol=args.tol,
+        backend=args.backend,
+        derived=parse_derived(args.derived),
+        ensemble=args.ensemble,
+        chunk_size=args.chunk_size,
+        workers=max(args.workers, 1),
+        cache_size=max(args.cache_size, 0),
+        dedup=not args.no_dedup,
+        store_path=args.store,
+        min_iter=max(args.min_iter, 0),
+        ftol=args.ftol,
+        progress=None if args.quiet else progress,
+    )
+    print(f"已存储至 {stats.output_path}")
+    print(stats.summary())
+    return 1 if stats.failed_chunks else 0
+
+def run_profile_command(args):
+    from .config import load_g_value
+    from .profile import run_profile_batch
+
+    output = args.output or default_output(args.input)
+    stats = run_profile_batch(
+        args.input, output,
+        temperature_unit=TEMPERATURE_UNITS[args.temp_unit],
+        pressure_unit=args.pressure_unit,
+        method=None if args.formula == 'auto' else args.formula,
+        g=args.g or load_g_value(),
+        z0=args.elevation,
+        tol=args.tol,
+        backend=args.backend,
+        chunk_size=args.chunk_size,
+    )
+    print(f"已存储至 {stats.output_path}")
+    print(stats.summary())
+    return 0
+
+def run_fields_command(args):
+    from .fields import solve_fields
+
+    try:
+        pressure = float(args.pressure)
+    except ValueError:
+        pressure = args.pressure
+    start = time.perf_counter()
+    paths = solve_fields(
+        MODES[args.mode], args.temperature, args.humidity, pressure, args.output_dir,
+        prefix=args.prefix,
+        method=None if args.formula == 'auto' else args.formula,
+        temperature_unit=TEMPERATURE_UNITS[args.temp_unit],
+        pressure_unit=args.pressure_unit,
+        guess_strategy=GUESSES[args.guess],
+        tol=args.tol,
+        backend=args.backend,
+        tile_size=max(args.tile_size, 1),
+    )
+    for path in paths.values():
+        print(f"已存储至 {path}")
+    print(f"用时 {time.perf_counter() - start:.2f} 秒")
+    return 0
+
+def run_grid_command(args):
+    from .formulas import METHOD_NAMES
+    from .grid import WetBulbGrid
+
+    for method in METHOD_NAMES if args.formulas == 'all' else parse_formulas(args.formulas):
+        start = time.perf_counter()
+        grid = WetBulbGrid.build(method, args.step, args.p_step)
+        print(f"{method}: {grid.data.filename}  {grid.data.nbytes / 1e6:.1f}MB  用时 {time.perf_counter() - start:.2f} 秒")
+    return 0
+
+def run_poly_report(args):
+    from .poly import error_report
+
+    report = error_report(args.tol, parse_formulas(args.formulas))
+    print(f"{'公式':<12}{'范围(℃)':>14}{'分段':>6}{'段宽':>6}{'次数':>6}{'e_sat误差':>12}{'de/dT误差':>12}")
+    for r in report:
+        lo, hi = r['range']
+        print(f"{r['method']:<12}{f'{lo}~{hi}':>14}{r['segments']:>6}{r['segment_width']:>6g}{r['degree']:>6}"
+              f"{r['max_rel_error']:>12.2e}{r['max_rel_error_dedt']:>12.2e}{'' if r['ok'] else '  未达到精度'}")
+    return 0 if all(r['ok'] for r in report) else 1
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        if args.command == 'batch':
+            return run_batch_command(args)
+        if args.command == 'profile':
+            return run_profile_command(args)
+        if args.command == 'fields':
+            return run_fields_command(args)
+        if args.command == 'grid':
+            return run_grid_command(args)
+        if args.command == 'poly-report':
+            return run_poly_report(args)
+    except KeyboardInterrupt:
+        print("已取消", file=sys.stderr)
+        return 130
+    except Exception as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 1
+    return 0
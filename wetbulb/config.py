@@ -0,0 +1,79 @@
+# 配置文件cfg.json的读写，只在调用时访问磁盘
+import sys
+import os
+import json
+
+def resource_path(relative_path):
+    if hasattr(sys, '_MEIPASS'):
+        # 打包后的临时资源目录
+        base_path = sys._MEIPASS
+    else:
+        # 开发环境下的当前目录
+        base_path = os.path.abspath(".")
+    return os.path.join(base_path, relative_path)
+
+def cache_dir():
+    # 查表、网格等可重新生成的数据的缓存目录
+    return os.environ.get('WETBULB_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'wetbulb')
+
+def load_config():
+    try:
+        cfg_path = resource_path('cfg.json')
+        with open(cfg_path, 'r') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+def save_config(config):
+    cfg_path = resource_path('cfg.json')
+    with open(cfg_path, 'w') as f:
+        json.dump(config, f, ensure_ascii=False)
+
+def load_g_value():
+    return load_config().get('g', 9.81)
+
+def load_batch_formulas():
+    # 批量计算输出的公式列表，未设置时为None（按温度自动选择Goff公式）
+    return load_config().get('batch_formulas') or None
+
+def load_batch_derived():
+    # 批量计算追加输出的扩展气象参数名列表（或"all"），未设置时不输出
+    return load_config().get('batch_derived') or None
+
+def load_batch_ensemble():
+    # 批量计算是否追加各公式结果之间的统计列，默认不追加
+    return bool(load_config().get('batch_ensemble', False))
+
+def load_batch_store():
+    # 批量计算使用的SQLite结果库路径，未设置时不使用结果库
+    return load_config().get('batch_store') or None
+
+def load_batch_workers():
+    # 批量计算使用的进程数，默认1（不启用进程池）
+    return _load_int('batch_workers', 1, 1)
+
+def _load_int(key, default, minimum):
+    try:
+        return max(int(load_config().get(key, default)), minimum)
+    except (TypeError, ValueError):
+        return default
+
+def load_batch_min_iter():
+    # 批量计算湿球迭代的最少次数，默认0（收敛即停止）；设为5时与旧版结果一致
+    return _load_int('batch_min_iter', 0, 0)
+
+def load_cache_size():
+    # 界面单次计算的结果缓存容量，0为不缓存
+    return _load_int('cache_size', 4096, 0)
+
+def load_batch_cache_size():
+    # 批量计算每个进程的结果缓存容量，默认0（不缓存）
+    return _load_int('batch_cache_size', 0, 0)
+
+def save_g_value(g_value):
+    try:
+        config = load_config()
+        config['g'] = g_value
+        save_config(config)
+    except Exception as e:
+        print(f"保存g值失败: {str(e)}")
@@ -0,0 +1,112 @@
+# 扩展气象参数（焓值、混合率、位温、LCL等），温度单位℃，压强单位hPa
+import math
+
+from .formulas import calculate_esat
+
+R = 8.314462618
+Mv = 18.01528
+Md = 28.9647
+Rv = 1000*R/Mv  # 水汽气体常数
+Rd = 1000*R/Md  # 干空气
+Cpw = 1864 # 水的定压比热容
+ups = Mv/Md
+upsilon = (1-ups)/ups
+
+# 参数名 -> (中文名, 单位)；单位为UNIT_TEMPERATURE/UNIT_PRESSURE时随用户选择的单位换算
+UNIT_TEMPERATURE = 'T'
+UNIT_PRESSURE = 'P'
+DERIVED_PARAMETERS = {
+    'rh': ('相对湿度', '%'),
+    'absolute_humidity': ('绝对湿度', 'g/m³'),
+    'specific_humidity': ('比湿', 'g/kg'),
+    'e': ('蒸气压', UNIT_PRESSURE),
+    'es': ('饱和蒸气压', UNIT_PRESSURE),
+    'P_dry': ('干空气分压', UNIT_PRESSURE),
+    'ro_dry': ('干空气密度', 'kg/m³'),
+    'ro_vapor': ('水蒸气密度', 'kg/m³'),
+    'ro': ('空气密度', 'kg/m³'),
+    'enthalpy': ('焓值', 'kJ/kg'),
+    'L_v': ('蒸发潜热', 'kJ/kg'),
+    'mixing_ratio': ('含湿量', 'g/kg'),
+    'sat_mixing_ratio': ('饱和混合率', 'g/kg'),
+    'theta': ('位温', UNIT_TEMPERATURE),
+    'theta_e': ('相当位温', UNIT_TEMPERATURE),
+    'virtual_temp': ('虚温', UNIT_TEMPERATURE),
+    'theta_v': ('虚位温', UNIT_TEMPERATURE),
+    't_lcl': ('lcl温度', UNIT_TEMPERATURE),
+    'p_lcl': ('lcl压强', UNIT_PRESSURE),
+    'esw': ('湿球蒸气压', UNIT_PRESSURE),
+}
+
+def select_derived(names=None):
+    # names为None或'all'时返回全部参数名，否则检查并按给定顺序返回
+    if names is None or names == 'all':
+        return list(DERIVED_PARAMETERS)
+    if isinstance(names, str):
+        names = [names]
+    unknown = [name for name in names if name not in DERIVED_PARAMETERS]
+    if unknown:
+        raise ValueError(f"无效的气象参数: {', '.join(unknown)}")
+    return list(names)
+
+def derived_parameters(method_name, T_g, Td, Tw, rh, P_hPa):
+    # 返回参数名到数值的字典；温度类结果为℃，压强类结果为hPa
+    T_g_K = T_g + 273.15
+    Cp = 1004.7463+0.05*T_g  # 定压比热容（精确值）
+
+    es = calculate_esat(T_g, method_name)
+    esw = calculate_esat(Tw, method_name)
+    e = calculate_esat(Td, method_name)
+    P_dry = P_hPa - e
+
+    ro_dry = P_dry*100/(Rd*T_g_K)
+    ro_vapor = esw*100/(Rv*T_g_K)
+    ro = ro_dry + ro_vapor
+    dm = ro_vapor/ro_dry  # 含湿量就是混合率
+    L_v = 2500.8-2.3665*T_g-0.0023*T_g**2+1.87e-5*T_g**3-4.2e-8*T_g**4  # 蒸发潜热
+    han = Cp/1000*T_g+(L_v+Cpw/1000*T_g)*dm
+
+    sat_mixing_ratio = ups*(e/(P_hPa-e))*1000 if P_hPa > e else 0  # 饱和混合率 (g/kg)
+    absolute_humidity = (e*100)/(Rv*T_g_K)*1e3  # 绝对湿度 (g/m³)
+    specific_humidity = (ups*e)/(P_hPa-(1-ups)*e)*1000 if P_hPa > (1-ups)*e else 0  # 比湿 (g/kg)
+
+    q = specific_humidity/1000  # 比湿转kg/kg
+    virtual_temp = T_g_K*(1+upsilon*q)  # 精确系数0.6078
+
+    theta_K = T_g_K*(1000/P_hPa)**(Rd/Cp)  # 位温THTA
+    theta_e = theta_K*math.exp(L_v*1000*q/(Cp*T_g_K))  # 相当位温THTE，L_v由kJ/kg换成J/kg
+    theta_v = theta_K*(1+upsilon*q)  # 虚位温THTV
+
+    # 计算LCL，避免可能的数学错误
+    try:
+        numerator = 1/(Td-56)
+        denominator = math.log(rh)/800
+        t_lcl = 1/(numerator-denominator)+56  # Bolton公式
+        exponent = Cp/Rd
+        p_lcl = P_hPa*((t_lcl+273.15)/T_g_K)**exponent
+    except (ValueError, ZeroDivisionError):
+        t_lcl = float('nan')
+        p_lcl = float('nan')
+
+    return {
+        'rh': rh,
+        'absolute_humidity': absolute_humidity,
+        'specific_humidity': specific_humidity,
+        'e': e,
+        'es': es,
+        'P_dry': P_dry,
+        'ro_dry': ro_dry,
+        'ro_vapor': ro_vapor,
+        'ro': ro,
+        'enthalpy': han,
+        'L_v': L_v,
+        'mixing_ratio': dm*1000,
+        'sat_mixing_ratio': sat_mixing_ratio,
+        'theta': theta_K-273.15,
+        'theta_e': theta_e-273.15,
+        'virtual_temp': virtual_temp-273.15,
+        'theta_v': theta_v-273.15,
+        't_lcl': t_lcl,
+        'p_lcl': p_lcl,
+        'esw': esw,
+    }
@@ -0,0 +1,94 @@
+# 数组版扩展气象参数：与derived_parameters公式相同，整列计算，不含逐行的Python循环
+# 各量按依赖关系组成一张小图，只计算所请求参数实际依赖的节点，e、es、q等中间量在参数之间共用
+import numpy as np
+
+from .derived import Rv, Rd, Cpw, ups, upsilon, select_derived
+from .vector import calculate_esat_array
+
+INPUTS = ('method', 'T_g', 'Td', 'Tw', 'rh', 'P')
+
+# 节点名 -> (输入节点, 计算函数)
+NODES = {}
+
+def _node(name, *inputs):
+    def register(func):
+        NODES[name] = (inputs, func)
+        return func
+    return register
+
+_node('T_g_K', 'T_g')(lambda T_g: T_g + 273.15)
+_node('Cp', 'T_g')(lambda T_g: 1004.7463+0.05*T_g)
+_node('es', 'method', 'T_g')(lambda method, T_g: calculate_esat_array(T_g, method))
+_node('esw', 'method', 'Tw')(lambda method, Tw: calculate_esat_array(Tw, method))
+_node('e', 'method', 'Td')(lambda method, Td: calculate_esat_array(Td, method))
+_node('P_dry', 'P', 'e')(lambda P, e: P - e)
+_node('ro_dry', 'P_dry', 'T_g_K')(lambda P_dry, T_g_K: P_dry*100/(Rd*T_g_K))
+_node('ro_vapor', 'esw', 'T_g_K')(lambda esw, T_g_K: esw*100/(Rv*T_g_K))
+_node('ro', 'ro_dry', 'ro_vapor')(lambda ro_dry, ro_vapor: ro_dry + ro_vapor)
+_node('dm', 'ro_vapor', 'ro_dry')(lambda ro_vapor, ro_dry: ro_vapor/ro_dry)
+_node('L_v', 'T_g')(lambda T_g: 2500.8-2.3665*T_g-0.0023*T_g**2+1.87e-5*T_g**3-4.2e-8*T_g**4)
+_node('enthalpy', 'Cp', 'T_g', 'L_v', 'dm')(lambda Cp, T_g, L_v, dm: Cp/1000*T_g+(L_v+Cpw/1000*T_g)*dm)
+_node('mixing_ratio', 'dm')(lambda dm: dm*1000)
+_node('sat_mixing_ratio', 'P', 'e')(lambda P, e: np.where(P > e, ups*(e/(P-e))*1000, 0.0))
+_node('absolute_humidity', 'e', 'T_g_K')(lambda e, T_g_K: (e*100)/(Rv*T_g_K)*1e3)
+_node('specific_humidity', 'P', 'e')(lambda P, e: np.where(P > (1-ups)*e, (ups*e)/(P-(1-ups)*e)*1000, 0.0))
+_node('q', 'specific_humidity')(lambda specific_humidity: specific_humidity/1000)
+_node('virtual_temp_K', 'T_g_K', 'q')(lambda T_g_K, q: T_g_K*(1+upsilon*q))
+_node('theta_K', 'T_g_K', 'P', 'Cp')(lambda T_g_K, P, Cp: T_g_K*(1000/P)**(Rd/Cp))
+_node('theta_e_K', 'theta_K', 'L_v', 'q', 'Cp', 'T_g_K')(
+    lambda theta_K, L_v, q, Cp, T_g_K: theta_K*np.exp(L_v*1000*q/(Cp*T_g_K)))  # L_v由kJ/kg换成J/kg
+_node('theta_v_K', 'theta_K', 'q')(lambda theta_K, q: theta_K*(1+upsilon*q))
+_node('theta', 'theta_K')(lambda theta_K: theta_K-273.15)
+_node('theta_e', 'theta_e_K')(lambda theta_e_K: theta_e_K-273.15)
+_node('virtual_temp', 'virtual_temp_K')(lambda virtual_temp_K: virtual_temp_K-273.15)
+_node('theta_v', 'theta_v_K')(lambda theta_v_K: theta_v_K-273.15)
+
+@_node('t_lcl', 'Td', 'rh')
+def _t_lcl(Td, rh):
+    # Bolton公式；与标量版一致：log(rh)或分母为0时为nan
+    numerator = 1/(Td-56)
+    denominator = np.log(rh)/800
+    ok = (rh > 0) & (Td != 56) & (numerator != denominator)
+    return np.where(ok, 1/(numerator-denominator)+56, np.nan)
+
+_node('p_lcl', 'P', 't_lcl', 'T_g_K', 'Cp')(lambda P, t_lcl, T_g_K, Cp: P*((t_lcl+273.15)/T_g_K)**(Cp/Rd))
+
+def dependencies(names=None):
+    # 计算所选参数需要经过的全部节点（不含输入），按计算顺序排列
+    order = []
+
+    def visit(name):
+        if name in INPUTS or name in order:
+            return
+        for dependency in NODES[name][0]:
+            visit(dependency)
+        order.append(name)
+
+    for name in select_derived(names):
+        visit(name)
+    return order
+
+class DerivedEvaluator:
+    # 按需计算并保存各节点的值；computed记录实际计算过的节点及顺序，供检查
+    def __init__(self, method, T_g, Td, Tw, rh, P_hPa):
+        T_g, Td, Tw, rh, P_hPa = np.broadcast_arrays(
+            *(np.asarray(values, dtype=float) for values in (T_g, Td, Tw, rh, P_hPa)))
+        self.values = {'method': method, 'T_g': T_g, 'Td': Td, 'Tw': Tw, 'rh': rh, 'P': P_hPa}
+        self.computed = []
+
+    def get(self, name):
+        if name not in self.values:
+            inputs, func = NODES[name]
+            args = [self.get(dependency) for dependency in inputs]
+            with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+                self.values[name] = func(*args)
+            self.computed.append(name)
+        return self.values[name]
+
+    def evaluate(self, names=None):
+        return {name: self.get(name) for name in select_derived(names)}
+
+def derived_parameters_array(method, T_g, Td, Tw, rh, P_hPa, names=None):
+    # method可为公式名或逐元素的公式编号数组；rh为小数
+    # 返回参数名到数组的字典，names给出时只计算并返回所选参数；无法计算的元素为nan
+    return DerivedEvaluator(method, T_g, Td, Tw, rh, P_hPa).evaluate(names)
@@ -0,0 +1,107 @@
+# 多公式求解：所选公式的结果沿第0轴排开，并给出公式之间的统计量
+# 单个点与整列数据都适用，可用来估计公式选择带来的不确定性
+import warnings
+
+import numpy as np
+
+from .formulas import select_methods, METHOD_IDS
+from .solver import (STATUS_OK, STATUS_RESIDUAL, STATUS_NOT_CONVERGED, MODE_DEWPOINT, MODE_WETBULB, MODE_RH,
+                     GUESS_TD, initial_guess, CalculatorMemory)
+from .vector import calculate_wetbulb_array, calculate_dewpoint_array, calculate_both_array
+
+STAT_LABELS = {'mean': '均值', 'std': '标准差', 'min': '最小值', 'max': '最大值', 'spread': '极差', 'count': '公式数'}
+
+class EnsembleResult:
+    # Td、Tw、rh、status的形状均为(公式数,)+输入形状；失败的元素为nan
+    # 已知相对湿度时湿球失败的公式仍保留反解出的露点，供界面显示，但不参与统计
+    __slots__ = ('mode', 'formulas', 'Td', 'Tw', 'rh', 'status')
+
+    def __init__(self, mode, formulas, Td, Tw, rh, status):
+        self.mode = mode
+        self.formulas = formulas
+        self.Td = Td
+        self.Tw = Tw
+        self.rh = rh
+        self.status = status
+
+    def stats(self, name=None):
+        # 各公式结果的均值、标准差、最小值、最大值、极差与参与统计的公式数
+        # name默认为本模式求解的量：已知露点时为Tw，其余为Td
+        if name is None:
+            name = 'Tw' if self.mode == MODE_DEWPOINT else 'Td'
+        # 与批量输出的逐公式列一致，只统计状态为成功的公式
+        values = np.where(self.status == STATUS_OK, getattr(self, name), np.nan)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            low = np.nanmin(values, axis=0)
+            high = np.nanmax(values, axis=0)
+            return {
+                'mean': np.nanmean(values, axis=0),
+                'std': np.nanstd(values, axis=0),
+                'min': low,
+                'max': high,
+                'spread': high - low,
+                'count': np.isfinite(values).sum(axis=0),
+            }
+
+    def to_calculator(self, index=()):
+        # 把单个点（index为其在输入中的下标）的结果整理成CalculatorMemory，供界面列表显示
+        calculator = CalculatorMemory()
+        for k, name in enumerate(self.formulas):
+            status = int(self.status[(k,) + index])
+            Td = float(self.Td[(k,) + index])
+            Tw = float(self.Tw[(k,) + index])
+            rh = float(self.rh[(k,) + index])
+            if self.mode == MODE_DEWPOINT:
+                if status == STATUS_OK:
+                    calculator.add_result(name, Tw, rh=rh)
+                else:
+                    calculator.add_status(name, status)
+            elif self.mode == MODE_WETBULB:
+                if status == STATUS_OK:
+                    calculator.add_result(name, Td, rh=rh)
+                else:
+                    calculator.add_status(name, status)
+            elif status == STATUS_OK:
+                calculator.add_result(name, Td, Tw)
+            elif status in (STATUS_RESIDUAL, STATUS_NOT_CONVERGED) and Td == Td:
+                calculator.add_result(name, Td, status2=status)
+            else:
+                calculator.add_status(name, status)
+        return calculator
+
+def ensemble_solve(mode, T, X, P=1013.25, formulas=None, guess=None, guess_strategy=GUESS_TD, tol=1e-6,
+                   backend='exact', min_iter=0, ftol=None):
+    # X为露点（MODE_DEWPOINT）、湿球（MODE_WETBULB）或相对湿度百分比（MODE_RH），温度为℃，压强为hPa
+    # guess给出湿球初值时优先使用，否则按guess_strategy确定；min_iter、ftol为湿球迭代的停止条件
+    if mode not in (MODE_DEWPOINT, MODE_WETBULB, MODE_RH):
+        raise ValueError("无效的计算模式")
+    names = [name for name, _ in select_methods(formulas)]
+    T, X, P = np.broadcast_arrays(*(np.asarray(values, dtype=float) for values in (T, X, P)))
+    shape = T.shape
+    T, X, P = T.ravel(), X.ravel(), P.ravel()
+    if guess is not None:
+        guess = np.broadcast_to(np.asarray(guess, dtype=float), shape).ravel()
+    elif mode == MODE_DEWPOINT:
+        guess = initial_guess(guess_strategy, T, X)
+    elif mode == MODE_RH and guess_strategy != GUESS_TD:
+        guess = initial_guess(guess_strategy, T, None, rh=X)
+    # 所选公式沿第0轴叠放成一个数组，逐元素给出公式编号，一次求解全部公式
+    count, size = len(names), T.size
+    ids = np.repeat(np.array([METHOD_IDS[name] for name in names], dtype=np.intp), size)
+    T, X, P = np.tile(T, count), np.tile(X, count), np.tile(P, count)
+    if guess is not None:
+        guess = np.tile(guess, count)
+    if mode == MODE_DEWPOINT:
+        Tw, rh, _, status = calculate_wetbulb_array(guess, T, X, P, ids, tol=tol, backend=backend, min_iter=min_iter,
+                                                    ftol=ftol)
+        Td = np.where(status == STATUS_OK, X, np.nan)
+    elif mode == MODE_WETBULB:
+        Td, rh, _, status = calculate_dewpoint_array(T, X, P, ids, tol=tol, backend=backend)
+        Tw = np.where(status == STATUS_OK, X, np.nan)
+    else:
+        Td, Tw, _, status = calculate_both_array(guess, T, X, P, ids, tol=tol, backend=backend, min_iter=min_iter,
+                                                 ftol=ftol)
+        rh = np.where(np.isfinite(Td), X / 100, np.nan)
+    shape = (count,) + shape
+    return EnsembleResult(mode, names, *(values.reshape(shape) for values in (Td, Tw, rh, status)))
@@ -0,0 +1,78 @@
+# 格点场计算：从.npy文件以内存映射读取模式输出的温度、露点/湿球/相对湿度与气压场（时间×纬度×经度，可含层次），
+# 逐块用数组求解器计算，结果写入以内存映射打开的.npy文件
+# 每块只把本块的输入复制到内存中，进程自身的内存占用由tile_size决定，与场的总大小无关；
+# 映射文件读写过的页面属于系统的页面缓存，内存紧张时由系统回收
+import os
+
+import numpy as np
+
+from .batch import solve_rows
+from .solver import GUESS_TD, MODE_DEWPOINT, MODE_WETBULB, MODE_RH
+
+TILE_SIZE = 1 << 20  # 每块的元素数
+
+FIELD_NAMES = {
+    MODE_DEWPOINT: ['Tw'],
+    MODE_WETBULB: ['Td'],
+    MODE_RH: ['Td', 'Tw'],
+}
+
+def _open_field(field):
+    # 字符串视为.npy文件路径，以只读内存映射打开；其余按数组处理
+    if isinstance(field, (str, os.PathLike)):
+        return np.load(field, mmap_mode='r')
+    return np.asarray(field)
+
+def _tiles(shape, tile_size):
+    # 产出各块的下标：从第0轴起找到其后各轴元素数不超过tile_size的轴，沿该轴分段，其前各轴逐个取值
+    axis = 0
+    while axis < len(shape) - 1 and int(np.prod(shape[axis + 1:])) > tile_size:
+        axis += 1
+    step = max(1, tile_size // int(np.prod(shape[axis + 1:])))
+    for lead in np.ndindex(*shape[:axis]):
+        for start in range(0, shape[axis], step):
+            yield lead + (slice(start, start + step),)
+
+def solve_fields(mode, T, X, P, output_dir, prefix='', method=None, temperature_unit='℃', pressure_unit='hPa',
+                 guess_strategy=GUESS_TD, tol=1e-6, backend='exact', tile_size=TILE_SIZE, progress=None):
+    # T为温度场，X为露点（MODE_DEWPOINT）、湿球（MODE_WETBULB）或相对湿度百分比（MODE_RH）场，形状相同；
+    # P可为常数或可广播到该形状的场（如(层数,1,1)），均可为.npy路径或数组
+    # 结果按output_dir/<prefix><Tw|Td>.npy写出（用户温度单位，失败为nan），数据类型与温度场相同（整数场为float64）
+    # method为None时按温度选Goff水面/冰面公式；返回名称到输出路径的字典
+    # progress(已完成元素数, 总元素数)每块调用一次
+    T, X, P = (_open_field(field) for field in (T, X, P))
+    if T.ndim == 0 or X.shape != T.shape:
+        raise ValueError("温度场与湿度场的形状必须相同且至少为一维")
+    P = np.broadcast_to(P, T.shape)
+    dtype = T.dtype if np.issubdtype(T.dtype, np.floating) else np.float64
+
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {name: os.path.join(output_dir, f'{prefix}{name}.npy') for name in FIELD_NAMES[mode]}
+    tmp = {name: f'{path}.{os.getpid()}.tmp.npy' for name, path in paths.items()}
+    outputs = {name: np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=T.shape)
+               for name, path in tmp.items()}
+    try:
+        # P的广播视图按同样的下标取用，不必展开成完整的场
+        done = 0
+        for tile in _tiles(T.shape, tile_size):
+            T_t = np.asarray(T[tile], dtype=float)
+            results = solve_rows(mode, T_t.ravel(), np.asarray(X[tile], dtype=float).ravel(),
+                                 np.asarray(P[tile], dtype=float).ravel(), temperature_unit, pressure_unit,
+                                 guess_strategy, None if method is None else [method], tol, backend)
+            for name, values in zip(FIELD_NAMES[mode], results):
+                outputs[name][tile] = values.reshape(T_t.shape)
+            done += T_t.size
+            if progress is not None:
+                progress(done, T.size)
+        for name, output in outputs.items():
+            output.flush()
+        outputs.clear()
+        for name, path in paths.items():
+            os.replace(tmp[name], path)
+    except BaseException:
+        outputs.clear()
+        for path in tmp.values():
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    return paths
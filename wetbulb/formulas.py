@@ -0,0 +1,168 @@
+# 饱和水汽压公式及其导数、反函数（标量版，仅依赖标准库）
+import math
+
+MAGNUS_FORMULAS = {
+    'Magnus-水面':lambda T:(6.112,17.62,243.12),
+    'August-水面':lambda T:(6.1094,17.625,243.04),
+    'Tetens-水面':lambda T:(6.1078,17.269,237.3),
+    'Buck-水面':lambda T:(6.1121,17.502,240.97),
+    'Arden-水面':lambda T:(6.1121,18.678,257.14),
+    'Magnus-冰面':lambda T:(6.112,22.46,272.62),
+    'Buck-冰面':lambda T:(6.1115,22.452,272.55),
+}
+
+GOFF_FORMULAS = {
+    'Goff-水面':lambda T:(273.15,10.79574,-5.02808,1.50475e-4,-8.2969,0.42873e-3,4.76955,0.78614,0),
+    'Goff2-水面':lambda T:(373.15,7.90298,-5.02808,1.3816e-5,-11.344,0.0081328,3.49149,3.0057149,0),
+    'Goff-冰面':lambda T:(273.15,9.09718,3.56654,0,0,0,0,0.78614,0.876793),
+}
+
+WEXLER_FORMULAS = {
+    'Wexler-水面':lambda T:(-5800.2206,1.3914993,-0.048640239,0.41764768e-4,-0.14452093e-7,0,6.5459673),
+    'Wexler-冰面':lambda T:(-5674.5359,6.3925247,-0.009677843,0.62215701e-6,0.20747825e-8,-0.9484024e-12,4.1635019),
+}
+
+# 各公式的适用温度范围（℃）
+METHOD_RANGES = {
+    'Goff-水面':(-10,100),
+    'Wexler-水面':(-10,200),
+    'Buck-水面':(0,80),
+    'Tetens-水面':(0,50),
+    'Magnus-水面':(0,60),
+    'August-水面':(0,60),
+    'Arden-水面':(0,100),
+    'Gili-水面':(-10,20),
+    'Goff2-水面':(-10,100),
+    'Goff-冰面':(-100,10),
+    'Wexler-冰面':(-150,10),
+    'Magnus-冰面':(-65,0),
+    'Buck-冰面':(-80,0),
+    'Marti-冰面':(-150,0),
+}
+
+methods = [
+    (name,lambda T_w,lo=lo,hi=hi:lo <= T_w <= hi) for name,(lo,hi) in METHOD_RANGES.items()
+]
+
+METHOD_NAMES = [name for name,_ in methods]
+METHOD_IDS = {name:i for i,name in enumerate(METHOD_NAMES)}
+
+def select_methods(formulas=None):
+    # formulas为None时返回全部公式，否则按给定顺序只返回所选公式
+    if formulas is None:
+        return methods
+    if isinstance(formulas,str):
+        formulas = [formulas]
+    table = dict(methods)
+    unknown = [name for name in formulas if name not in table]
+    if unknown:
+        raise ValueError(f"无效的计算方法: {', '.join(unknown)}")
+    return [(name,table[name]) for name in formulas]
+
+def calculate_esat(T_w,method='Magnus-水面'):
+    T_k = T_w+273.15
+
+    if method in MAGNUS_FORMULAS:
+        A,B,C = MAGNUS_FORMULAS[method](T_w)
+        return A*math.exp(B*T_w/(C+T_w))
+
+    elif method in GOFF_FORMULAS:
+        A,B,C,D,E,F,G,H,I = GOFF_FORMULAS[method](T_w)
+        term1 = B*(1-A/T_k)
+        term2 = C*math.log10(T_k/A)
+        term3 = D*(1-10**(E*(T_k/A-1)))
+        term4 = F*(10**(G*(1-A/T_k))-1)
+        term5 = I*(1-T_k/A)
+        return 10**(term1+term2+term3+term4+term5+H)
+
+    elif method in WEXLER_FORMULAS:
+        A,B,C,D,E,F,G = WEXLER_FORMULAS[method](T_w)
+        term1 = A/T_k
+        term2 = B
+        term3 = C*T_k
+        term4 = D*T_k**2
+        term5 = E*T_k**3
+        term6 = F*T_k**4
+        term7 = G*math.log(T_k)
+        ln_esat = term1+term2+term3+term4+term5+term6+term7
+        return math.exp(ln_esat)/100
+
+    elif method == 'Gili-水面':
+        term1 = -3.142305*(1e3/T_k-1e3/373.16)
+        term2 = 8.2*math.log10(373.16/T_k)
+        term3 = -0.0024804*(373.16-T_k)
+        return 980.66*10**(0.00141966+term1+term2+term3)
+
+    elif method == 'Marti-冰面':
+        lg_esat = -2663.5/T_k+12.537
+        return 10**lg_esat/100
+
+    else:
+        raise ValueError("无效的计算方法")
+
+def calculate_dedt(T_w,method,delta=0.001):
+    T_k = T_w+273.15
+
+    if method in MAGNUS_FORMULAS:
+        A,B,C = MAGNUS_FORMULAS[method](T_w)
+        e_sat = calculate_esat(T_w,method)
+        return e_sat*(B*C)/(C+T_w)**2
+
+    elif method in GOFF_FORMULAS:
+        A,B,C,D,E,F,G,H,I = GOFF_FORMULAS[method](T_w)
+        term1 = B*A/T_k**2
+        term2 = C/(T_k*math.log(10))
+        term3 = -D*E/A*math.log(10)*10**(E*(T_k/A-1))
+        term4 = A*F*G/T_k**2*10**(G*(1-A/T_k))*math.log(10)
+        term5 = -I/A
+        e_sat = calculate_esat(T_w,method)
+        return e_sat*math.log(10)*(term1+term2+term3+term4+term5)
+
+    elif method in WEXLER_FORMULAS:
+        e_sat = calculate_esat(T_w,method)
+        A,B,C,D,E,F,G = WEXLER_FORMULAS[method](T_w)
+        d_sat = -A/T_k**2+C+2*D*T_k+3*E*T_k**2+4*F*T_k**3+G/T_k
+        return e_sat*d_sat
+
+    elif method == 'Gili-水面':
+        term1 = -3.142305*(1e3/T_k-1e3/373.16)
+        term2 = 8.2*math.log10(373.16/T_k)
+        term3 = -0.0024804*(373.16-T_k)
+        term4 = 3142.305/T_k**2-3.561215/T_k+0.0024804
+        return 980.66*10**(0.00141966+term1+term2+term3)*math.log(10)*term4
+
+    elif method == 'Marti-冰面':
+        lg_esat = -2663.5/T_k+12.537
+        return 10**lg_esat/100*math.log(10)*2663.5/T_k**2
+
+    else:
+        e1 = calculate_esat(T_w-delta,method)
+        e2 = calculate_esat(T_w+delta,method)
+        return (e2-e1)/(2*delta)
+
+def esat_calculate(e,method,max_iter,tol,mint=-150,maxt=200):
+    if method in MAGNUS_FORMULAS:
+        A,B,C = MAGNUS_FORMULAS[method](e)
+        term1 = math.log(e/A)
+        return C*term1/(B-term1)
+
+    # Magnus闭式初值+带区间保护的牛顿迭代，与esat_inverse_array算法相同
+    B,C = (22.46,272.62) if method.endswith('冰面') else (17.62,243.12)
+    ln_e = math.log(e)
+    term1 = ln_e-math.log(6.112)
+    t = min(max(C*term1/(B-term1),mint),maxt)
+    for iter_num in range(max_iter):
+        e_sat = calculate_esat(t,method)
+        g = math.log(e_sat)-ln_e
+        if g > 0:
+            maxt = t
+        else:
+            mint = t
+        t_new = t-g*e_sat/calculate_dedt(t,method)
+        if not mint <= t_new <= maxt:
+            t_new = (mint+maxt)/2
+        if abs(t_new-t) < tol or g == 0:
+            return t_new
+        t = t_new
+    return t
+
@@ -0,0 +1,120 @@
+# 湿球网格：在(干球T, 露点Td, 气压P)三维网格上预先求解湿球温度，查询时三线性插值，可再做牛顿校正
+# 网格以.npy文件保存在缓存目录，以内存映射方式打开：多个进程共用系统的页面缓存，打开网格只需打开文件
+#
+# 默认步长1℃、25hPa（Goff-水面约2.5MB）时，插值的平均误差约0.002℃，T≈Td附近最大约0.25℃；
+# 一次牛顿校正后最大误差约1e-3℃，两次后约1e-6℃
+# Td>=T的格点记为饱和（Tw=T）；公式不适用或未收敛的格点为nan，落在其旁的查询退回迭代求解
+import os
+
+import numpy as np
+
+from .config import cache_dir
+from .formulas import METHOD_RANGES, METHOD_IDS
+from .solver import STATUS_OK
+from .units import PRESSURE_MIN, PRESSURE_MAX
+
+DEFAULT_STEP = 1.0
+DEFAULT_P_STEP = 25.0
+GRID_VERSION = 1
+
+_grids = {}
+
+def grid_axes(method, step=DEFAULT_STEP, p_step=DEFAULT_P_STEP):
+    # 温度轴（T与Td共用）覆盖公式的适用范围，气压轴覆盖界面允许的输入范围
+    lo, hi = METHOD_RANGES[method]
+    T = lo + step * np.arange(int(np.ceil((hi - lo) / step - 1e-9)) + 1)
+    P = PRESSURE_MIN + p_step * np.arange(int(np.ceil((PRESSURE_MAX - PRESSURE_MIN) / p_step - 1e-9)) + 1)
+    return T, P
+
+def grid_path(method, step=DEFAULT_STEP, p_step=DEFAULT_P_STEP):
+    return os.path.join(cache_dir(), f'wetbulb_{METHOD_IDS[method]:02d}_{step:g}_{p_step:g}_v{GRID_VERSION}.npy')
+
+class WetBulbGrid:
+    def __init__(self, method, data, step=DEFAULT_STEP, p_step=DEFAULT_P_STEP):
+        self.method = method
+        self.data = data  # 形状(nT, nTd, nP)
+        self.step = step
+        self.p_step = p_step
+        self.T0 = float(METHOD_RANGES[method][0])
+        self.P0 = float(PRESSURE_MIN)
+
+    @classmethod
+    def build(cls, method, step=DEFAULT_STEP, p_step=DEFAULT_P_STEP):
+        # 逐个气压层用数组求解器计算，直接写入内存映射文件，完成后再替换到正式路径
+        from .vector import calculate_wetbulb_array
+
+        T, P = grid_axes(method, step, p_step)
+        path = grid_path(method, step, p_step)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.tmp.npy'
+        data = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.float64, shape=(len(T), len(T), len(P)))
+        T_g, T_d = np.meshgrid(T, T, indexing='ij')
+        for k, p in enumerate(P):
+            T_w, _, _, status = calculate_wetbulb_array(T_d, T_g, T_d, np.full(T_g.shape, p), method)
+            T_w[status != STATUS_OK] = np.nan
+            data[:, :, k] = np.where(T_d >= T_g, T_g, T_w)
+        data.flush()
+        del data
+        os.replace(tmp, path)
+        return cls.open(method, step, p_step)
+
+    @classmethod
+    def open(cls, method, step=DEFAULT_STEP, p_step=DEFAULT_P_STEP):
+        return cls(method, np.load(grid_path(method, step, p_step), mmap_mode='r'), step, p_step)
+
+    def interpolate(self, T, Td, P):
+        # 三线性插值；网格外的查询为nan
+        T, Td, P = np.broadcast_arrays(*(np.asarray(values, dtype=float) for values in (T, Td, P)))
+        shape = self.data.shape
+        x = (T - self.T0) / self.step
+        y = (Td - self.T0) / self.step
+        z = (P - self.P0) / self.p_step
+        inside = ((x >= 0) & (x <= shape[0] - 1) & (y >= 0) & (y <= shape[1] - 1)
+                  & (z >= 0) & (z <= shape[2] - 1))
+        out = np.full(T.shape, np.nan)
+        x, y, z = x[inside], y[inside], z[inside]
+        i = np.minimum(x.astype(np.intp), shape[0] - 2)
+        j = np.minimum(y.astype(np.intp), shape[1] - 2)
+        k = np.minimum(z.astype(np.intp), shape[2] - 2)
+        fx, fy, fz = x - i, y - j, z - k
+        value = 0.0
+        for di, wx in ((0, 1 - fx), (1, fx)):
+            for dj, wy in ((0, 1 - fy), (1, fy)):
+                for dk, wz in ((0, 1 - fz), (1, fz)):
+                    value = value + wx * wy * wz * self.data[i + di, j + dj, k + dk]
+        out[inside] = value
+        return out
+
+    def lookup(self, T, Td, P, polish=1, fallback=True):
+        # polish为插值后牛顿校正的步数；fallback为True时插值失败的点改用迭代求解
+        from .vector import calculate_esat_array, calculate_dedt_array, calculate_wetbulb_array
+
+        T, Td, P = np.broadcast_arrays(*(np.asarray(values, dtype=float) for values in (T, Td, P)))
+        T_w = self.interpolate(T, Td, P)
+        with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+            e = calculate_esat_array(Td, self.method)
+            for _ in range(polish):
+                gamma = 0.000667 * (1 + 0.00115 * T_w) * P
+                f = calculate_esat_array(T_w, self.method) - gamma * (T - T_w) - e
+                df_dT = calculate_dedt_array(T_w, self.method) + gamma - 0.000667 * 0.00115 * P * (T - T_w)
+                T_w = T_w - f / df_dT
+        T_w = np.where(Td >= T, T, T_w)
+        missing = np.isnan(T_w) & np.isfinite(T) & np.isfinite(Td) & np.isfinite(P)
+        if fallback and missing.any():
+            solved, _, _, status = calculate_wetbulb_array(Td[missing], T[missing], Td[missing], P[missing],
+                                                           self.method)
+            T_w[missing] = np.where(status == STATUS_OK, solved, np.nan)
+        return T_w
+
+def get_grid(method='Goff-水面', step=DEFAULT_STEP, p_step=DEFAULT_P_STEP):
+    # 依次查找本进程已打开的网格、磁盘上的网格文件，都没有时建立
+    key = (method, step, p_step)
+    if key not in _grids:
+        try:
+            _grids[key] = WetBulbGrid.open(method, step, p_step)
+        except (OSError, ValueError):
+            _grids[key] = WetBulbGrid.build(method, step, p_step)
+    return _grids[key]
+
+def wetbulb_lookup(T, Td, P=1013.25, method='Goff-水面', polish=1):
+    return get_grid(method).lookup(T, Td, P, polish)
@@ -0,0 +1,192 @@
+# 探空剖面：整条（或多条）探空廓线一次求解各层的湿球温度、相对湿度、位温与相当位温，
+# 再用测高公式由虚温逐层积分高度，求出湿球零度层的高度与气压
+# 廓线为按层排列的数组，形状(层数,)或(廓线数, 层数)，各层自下而上（气压递减），层数不足的廓线在末尾以nan补齐
+# 温度为℃，压强为hPa，高度为m
+import os
+import time
+
+import numpy as np
+
+from .batch import BatchCancelled, BatchStats, _to_float
+from .derived import Rd
+from .derived_vector import DerivedEvaluator
+from .formulas import METHOD_IDS
+from .sheets import SheetReader, SheetWriter, is_csv
+from .solver import STATUS_NOT_APPLICABLE, STATUS_FAILED, GUESS_STULL, initial_guess
+from .units import PROFILE_PRESSURE_MIN, PROFILE_PRESSURE_MAX, to_celsius, from_celsius, to_hpa
+from .vector import METHOD_MIN, METHOD_MAX, calculate_wetbulb_array
+
+DEFAULT_G = 9.81
+
+class SoundingResult:
+    # 各层的量形状与输入相同；wbz_height、wbz_pressure每条廓线一个值
+    __slots__ = ('P', 'T', 'Td', 'Tw', 'rh', 'theta', 'theta_e', 'z', 'status', 'wbz_height', 'wbz_pressure')
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            setattr(self, name, values[name])
+
+def _previous_valid(valid):
+    # 每层之下最近一个有效层的下标，没有时为-1；用于跳过缺测层，相当于逐条廓线只取有效层
+    index = np.where(valid, np.arange(valid.shape[1]), -1)
+    last = np.maximum.accumulate(index, axis=1)
+    return np.concatenate([np.full((len(valid), 1), -1), last[:, :-1]], axis=1)
+
+def _heights(P, T_v, z0, g):
+    # 测高公式：相邻两有效层间厚度 = Rd*平均虚温/g*ln(P下/P上)，从最低有效层的z0开始累加，缺测层为nan
+    T_v = T_v + 273.15
+    valid = np.isfinite(P) & np.isfinite(T_v)
+    prev = _previous_valid(valid)
+    below = np.maximum(prev, 0)
+    P_below = np.take_along_axis(P, below, axis=1)
+    T_v_below = np.take_along_axis(T_v, below, axis=1)
+    step = valid & (prev >= 0)
+    dz = np.zeros(P.shape)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        dz[step] = Rd / g * (T_v[step] + T_v_below[step]) / 2 * np.log(P_below[step] / P[step])
+    z = z0 + np.cumsum(dz, axis=1)
+    z[~valid] = np.nan
+    return z
+
+def _wetbulb_zero(P, Tw, z):
+    # 只看有湿球温度的层：自下而上第一次由正转为非正的相邻两层之间按湿球温度线性插值；
+    # 最低一层有湿球温度的层已不高于0℃时取该层，整条廓线都高于0℃（或没有湿度资料）时为nan
+    height = np.full(len(Tw), np.nan)
+    pressure = np.full(len(Tw), np.nan)
+    valid = np.isfinite(Tw)
+    prev = _previous_valid(valid)
+    below = np.maximum(prev, 0)
+    Tw_below = np.take_along_axis(Tw, below, axis=1)
+    with np.errstate(invalid='ignore'):
+        cross = valid & (prev >= 0) & (Tw_below > 0) & (Tw <= 0)
+        rows = np.flatnonzero(cross.any(axis=1))
+        if rows.size:
+            j = cross[rows].argmax(axis=1)
+            i = below[rows, j]
+            w = Tw[rows, i] / (Tw[rows, i] - Tw[rows, j])
+            height[rows] = z[rows, i] + w * (z[rows, j] - z[rows, i])
+            pressure[rows] = P[rows, i] * (P[rows, j] / P[rows, i]) ** w
+    first = valid.argmax(axis=1)
+    rows = np.flatnonzero(valid.any(axis=1) & (Tw[np.arange(len(Tw)), first] <= 0))
+    height[rows] = z[rows, first[rows]]
+    pressure[rows] = P[rows, first[rows]]
+    return height, pressure
+
+def profile_solve(P, T, Td, z0=0.0, method=None, g=DEFAULT_G, tol=1e-6, backend='exact'):
+    # method为None时按各层温度选Goff水面/冰面公式；z0为最低层的高度（如测站海拔），默认高度为离地高度
+    # 气压超出探空有效范围或缺温度的层结果为nan；缺露点的层只计算位温与高度（以温度代替虚温）
+    P, T, Td = np.broadcast_arrays(*(np.asarray(values, dtype=float) for values in (P, T, Td)))
+    shape = P.shape
+    P, T, Td = (values.reshape(-1, shape[-1]) for values in (P, T, Td))
+    Td = np.minimum(Td, T)  # 探空报告中偶有露点略高于温度的层，按饱和处理
+    if method is None:
+        method = np.where(T >= 0, METHOD_IDS['Goff-水面'], METHOD_IDS['Goff-冰面'])
+    ids = np.broadcast_to(METHOD_IDS[method] if isinstance(method, str) else method, P.shape)
+
+    valid = (P >= PROFILE_PRESSURE_MIN) & (P <= PROFILE_PRESSURE_MAX) & np.isfinite(T)
+    moist = valid & np.isfinite(Td)
+    Tw = np.full(P.shape, np.nan)
+    rh = np.full(P.shape, np.nan)
+    status = np.full(P.shape, STATUS_NOT_APPLICABLE, dtype=np.int8)
+    status[valid] = STATUS_FAILED
+    # 以Stull估计为初值并限制在公式适用范围内：低层干空气的露点常远低于水面公式的下限（-10℃），
+    # 以露点为初值时这些层会被判为不适用
+    guess = np.clip(initial_guess(GUESS_STULL, T[moist], Td[moist]), METHOD_MIN[ids[moist]], METHOD_MAX[ids[moist]])
+    Tw[moist], rh[moist], _, status[moist] = calculate_wetbulb_array(
+        guess, T[moist], Td[moist], P[moist], ids[moist], tol=tol, backend=backend)
+
+    theta, theta_e, T_v = (np.full(P.shape, np.nan) for _ in range(3))
+    values = DerivedEvaluator(ids[valid], T[valid], Td[valid], Tw[valid], rh[valid], P[valid]).evaluate(
+        ['theta', 'theta_e', 'virtual_temp'])
+    theta[valid] = values['theta']
+    theta_e[valid] = np.where(np.isfinite(Td[valid]), values['theta_e'], np.nan)  # 缺露点时比湿节点按0处理
+    T_v[valid] = np.where(np.isfinite(values['virtual_temp']), values['virtual_temp'], T[valid])
+
+    z = _heights(np.where(valid, P, np.nan), T_v, z0, g)
+    wbz_height, wbz_pressure = _wetbulb_zero(P, Tw, z)
+    return SoundingResult(
+        P=P.reshape(shape), T=T.reshape(shape), Td=Td.reshape(shape), Tw=Tw.reshape(shape), rh=rh.reshape(shape),
+        theta=theta.reshape(shape), theta_e=theta_e.reshape(shape), z=z.reshape(shape),
+        status=status.reshape(shape), wbz_height=wbz_height.reshape(shape[:-1]),
+        wbz_pressure=wbz_pressure.reshape(shape[:-1]))
+
+def profile_columns(temperature_unit='℃'):
+    return [f'湿球{temperature_unit}', '相对湿度%', f'位温{temperature_unit}', f'相当位温{temperature_unit}',
+            '高度m', '湿球零度高度m', '湿球零度气压hPa']
+
+def _solve_soundings(ids, P, T, Td, z0, method, g, tol, backend):
+    # 按标识把连续的行分成廓线，每条廓线内按气压从高到低排列后补齐为二维数组整体求解，结果按原行序返回
+    n = len(ids)
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    lengths = np.diff(np.r_[starts, n])
+    sounding = np.repeat(np.arange(len(starts)), lengths)
+    order = np.lexsort((-P, sounding))
+    level = np.empty(n, dtype=np.intp)
+    level[order] = np.arange(n) - np.repeat(starts, lengths)
+    grid = np.full((3, len(starts), lengths.max()), np.nan)
+    for k, values in enumerate((P, T, Td)):
+        grid[k, sounding, level] = values
+    result = profile_solve(grid[0], grid[1], grid[2], z0, method, g, tol, backend)
+    columns = [getattr(result, name)[sounding, level] for name in ('Tw', 'rh', 'theta', 'theta_e', 'z')]
+    return columns + [result.wbz_height[sounding], result.wbz_pressure[sounding]]
+
+def run_profile_batch(input_path, output_path, temperature_unit='℃', pressure_unit='hPa', method=None, g=DEFAULT_G,
+                      z0=0.0, tol=1e-6, backend='exact', chunk_size=10000, progress=None, cancel=None):
+    # 输入的A列为廓线标识（同一条廓线的各层须相邻），B列气压，C列温度，D列露点（可缺）
+    # 每层结果追加在末尾各列，湿球零度高度与气压在该廓线的每一层重复写出
+    # 跨数据块的廓线留到下一块一起求解；progress(已完成行数, 总行数)每块调用一次
+    start = time.perf_counter()
+    part_path = output_path + '.part'
+    done = 0
+    with SheetReader(input_path, chunk_size, keep_blank=False) as reader:  # 空行不是探空层
+        header = reader.header
+        if any(column not in header for column in 'ABCD'):
+            raise ValueError("探空文件必须包含ABCD列！")
+        a, b, c, d = (header.index(column) for column in 'ABCD')
+        labels = {'A': '廓线', 'B': f'气压{pressure_unit}', 'C': f'温度{temperature_unit}',
+                  'D': f'露点{temperature_unit}'}
+        out_header = [labels.get(name, name) for name in header] + profile_columns(temperature_unit)
+
+        def write(rows):
+            nonlocal done
+            ids = np.array([str(row[a]) for row in rows], dtype=object)
+            P = to_hpa(_to_float([row[b] for row in rows]), pressure_unit)
+            T = to_celsius(_to_float([row[c] for row in rows]), temperature_unit)
+            Td = to_celsius(_to_float([row[d] for row in rows]), temperature_unit)
+            results = _solve_soundings(ids, P, T, Td, z0, method, g, tol, backend)
+            for k in (0, 2, 3):
+                results[k] = from_celsius(results[k], temperature_unit)
+            results[1] = results[1] * 100
+            results = [[None if value != value else value for value in values.tolist()] for values in results]
+            writer.write_rows([row + list(values) for row, values in zip(rows, zip(*results))])
+            done += len(rows)
+            if progress is not None:
+                progress(done, max(reader.total_rows or 0, done))
+
+        writer = SheetWriter(part_path, csv_format=is_csv(output_path))
+        try:
+            writer.write_rows([out_header])
+            carry = []
+            for rows in reader.chunks():
+                if cancel is not None and cancel():
+                    raise BatchCancelled()
+                rows = carry + rows
+                last = str(rows[-1][a])
+                cut = len(rows)
+                while cut > 0 and str(rows[cut - 1][a]) == last:
+                    cut -= 1
+                if cut == 0:  # 整块都属于同一条廓线，继续读取
+                    carry = rows
+                    continue
+                carry = rows[cut:]
+                write(rows[:cut])
+            if carry:
+                write(carry)
+            writer.close()
+            os.replace(part_path, output_path)
+        except BaseException:
+            writer.close()
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+    return BatchStats(done, time.perf_counter() - start, output_path)
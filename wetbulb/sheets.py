@@ -0,0 +1,105 @@
+# 表格文件的流式读写：xlsx使用openpyxl只读/只写模式，csv使用标准库
+# 每次只在内存中保留一个数据块，内存占用与总行数无关
+import csv
+import os
+
+def is_csv(path):
+    return os.path.splitext(path)[1].lower() == '.csv'
+
+def _blank(row):
+    return all(value is None or value == '' for value in row)
+
+class SheetReader:
+    def __init__(self, path, chunk_size=10000, keep_blank=True):
+        # keep_blank为True时数据之间的空行原样产出（各列为None），输出与输入逐行对应；文件末尾的空行总是忽略
+        self.path = path
+        self.chunk_size = chunk_size
+        self.keep_blank = keep_blank
+        self._file = None
+        self._workbook = None
+        if is_csv(path):
+            self._file = open(path, newline='', encoding='utf-8-sig')
+            self._rows = csv.reader(self._file)
+        else:
+            import openpyxl
+            self._workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+            self._rows = self._workbook.active.iter_rows(values_only=True)
+        self.header = ['' if value is None else str(value) for value in next(self._rows, ())]
+        self.total_rows = self._count_rows()
+
+    def _count_rows(self):
+        # 估计数据行数，仅用于进度显示
+        if self._workbook is not None:
+            max_row = self._workbook.active.max_row
+            return max(max_row - 1, 0) if max_row else None
+        count = 0
+        with open(self.path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                count += block.count(b'\n')
+        return max(count - 1, 0)
+
+    def chunks(self):
+        # 逐块产出数据行，每行补齐到表头宽度
+        width = len(self.header)
+        chunk = []
+        blank = []  # 连续的空行，其后还有数据时才产出
+        for row in self._rows:
+            if _blank(row):
+                if self.keep_blank:
+                    blank.append([None] * width)
+                continue
+            row = list(row)
+            if len(row) < width:
+                row += [None] * (width - len(row))
+            if blank:
+                chunk += blank
+                blank = []
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        if self._workbook is not None:
+            self._workbook.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class SheetWriter:
+    def __init__(self, path, csv_format=None):
+        # csv_format为None时按扩展名判断格式
+        self.path = path
+        self._csv = is_csv(path) if csv_format is None else csv_format
+        self._closed = False
+        if self._csv:
+            self._file = open(path, 'w', newline='', encoding='utf-8-sig')
+            self._writer = csv.writer(self._file)
+        else:
+            import openpyxl
+            self._workbook = openpyxl.Workbook(write_only=True)
+            self._sheet = self._workbook.create_sheet()
+
+    def write_rows(self, rows):
+        if self._csv:
+            self._writer.writerows(rows)
+        else:
+            for row in rows:
+                self._sheet.append(row)
+
+    def close(self):
+        # 只关闭一次：只写模式的工作簿不能保存两次，出错后的清理再次调用时直接返回，不掩盖原来的异常
+        if self._closed:
+            return
+        self._closed = True
+        if self._csv:
+            self._file.close()
+        else:
+            self._workbook.save(self.path)
@@ -0,0 +1,437 @@
+# 标量求解器：逐公式迭代并记录迭代过程，供界面展示与对比
+from array import array
+
+from .formulas import select_methods,calculate_esat,calculate_dedt,esat_calculate
+from .units import from_celsius
+
+# 数组求解器的状态码，仅在显示时转换为文字
+STATUS_OK = 0
+STATUS_NOT_APPLICABLE = 1
+STATUS_UNPHYSICAL = 2
+STATUS_RESIDUAL = 3
+STATUS_NOT_CONVERGED = 4
+STATUS_OVERFLOW = 5
+STATUS_FAILED = 6
+STATUS_MESSAGES = {
+    STATUS_OK:'成功',
+    STATUS_NOT_APPLICABLE:'不适用',
+    STATUS_UNPHYSICAL:'结果不符常理',
+    STATUS_RESIDUAL:'残差过大',
+    STATUS_NOT_CONVERGED:'未收敛',
+    STATUS_OVERFLOW:'数值溢出',
+    STATUS_FAILED:'计算失败',
+}
+
+# 计算模式，与界面输入模式下拉框的顺序一致
+MODE_DEWPOINT = 0  # 已知露点求湿球
+MODE_WETBULB = 1   # 已知湿球求露点
+MODE_RH = 2        # 已知相对湿度同时求露点和湿球
+
+# 湿球迭代初值策略
+GUESS_TD = 0        # Tw=Td
+GUESS_T_MINUS_N = 1 # Tw=T-n
+GUESS_STULL = 2     # Stull(2011)经验公式
+GUESS_PREVIOUS = 3  # 按时间排列的数据沿用相邻行的解，只用于批量计算，单个点按Stull估计
+
+# 湿球迭代的停止条件：牛顿步长小于tol，或残差|f|（hPa）小于ftol（None为不检查），且已迭代至少min_iter次
+# 旧版固定至少迭代5次；标量求解默认沿用，结果与以前逐位一致；数组与批量求解默认不设下限
+MIN_ITER_LEGACY = 5
+
+# 湿球方程f(Tw)=e_sat(Tw)-γ(T-Tw)-e单调递增且下凸，Td<=T时f(Td)=-γ(Td)(T-Td)<=0<=f(T)=e_sat(T)-e，
+# 根必在[Td,T]内：初值限制在该区间内，每次迭代按f的符号收缩区间；牛顿步越出区间tol以上时（如极低温下
+# e_sat很小、从露点一侧出发的牛顿步越过T）改取区间两端的弦与横轴的交点，交点不在区间内部或连续第二次回退时
+# 取中点，区间每两次回退至少缩小一半。收敛后舍入误差级的摆动不算越出。已知露点、已知湿球两种模式下
+# 以露点或Stull为初值时结果与纯牛顿迭代逐位相同；相对湿度模式下有少数点相差在3e-14以内。
+# 有区间的元素不再判断残差过大。Td>T（不符常理的输入）时不设区间，按原来的牛顿迭代。
+# 公式是否适用仍按给定的初值判断（与以前相同），限制到区间内的只是迭代的起点
+
+def _stull(T, rh):
+    # 由温度（℃）与相对湿度（%）估计湿球温度，常温常压下误差约1℃以内
+    if hasattr(T, 'ndim') or hasattr(rh, 'ndim'):
+        import numpy as np
+        atan,sqrt = np.arctan,np.sqrt
+        rh = np.maximum(rh, 0)
+    else:
+        from math import atan,sqrt
+        rh = max(rh, 0)
+    return (T*atan(0.151977*sqrt(rh+8.313659))+atan(T+rh)-atan(rh-1.676331)
+            +0.00391838*rh**1.5*atan(0.023101*rh)-4.686035)
+
+def initial_guess(strategy, T, T_other, rh=None):
+    # T_other为露点；已知相对湿度（百分比）时由rh给出，T_other可为None
+    # Tw=Td策略在已知相对湿度时返回None，即以反解出的露点为初值
+    if strategy == GUESS_TD:
+        return T_other
+    elif strategy == GUESS_T_MINUS_N:
+        if hasattr(T, 'ndim') and T.ndim:
+            import numpy as np
+            return np.where(T < 0, T - 2, T - 5)
+        return T - 2 if T < 0 else T - 5
+    elif strategy in (GUESS_STULL, GUESS_PREVIOUS):
+        if rh is None:
+            rh = 100*10**(7.5*T_other/(237.3+T_other)-7.5*T/(237.3+T))  # Magnus公式估计的相对湿度，仅用于初值
+        # 估计值限制在Td<=Tw<=T之内
+        guess = _stull(T, rh)
+        if hasattr(guess, 'ndim'):
+            import numpy as np
+            guess = np.minimum(guess, T)
+            return guess if T_other is None else np.maximum(guess, T_other)
+        guess = min(guess, T)
+        return guess if T_other is None else max(guess, T_other)
+    raise ValueError("无效的初值策略")
+
+def _fallback(lo,hi,f_lo,f_hi,bisect):
+    # 牛顿步越出区间时的替代点：两端的弦与横轴的交点，不在区间内部或bisect为True时取中点
+    if not bisect and f_hi != f_lo:
+        T_c = lo-f_lo*(hi-lo)/(f_hi-f_lo)
+        if lo < T_c < hi:
+            return T_c
+    return (lo+hi)/2
+
+def calculate_wetbulb(initial_guess,T,Td,P=1013.25,max_iter=50,tol=1e-6,formulas=None,trace=False,
+                      min_iter=MIN_ITER_LEGACY,ftol=None):
+    calculator = CalculatorMemory(trace)
+
+    for name,condition in select_methods(formulas):
+
+        e = calculate_esat(Td,name)
+        if not condition(initial_guess):  # 适用范围按给定的初值判断，与区间保护无关
+            calculator.add_status(name,STATUS_NOT_APPLICABLE)
+            continue
+        bracketed = Td <= T
+        T_w = min(max(initial_guess,Td),T) if bracketed else initial_guess
+        lo,hi = Td,T
+        f_lo,f_hi = -0.000667*(1+0.00115*Td)*P*(T-Td),None  # f(T)在第一次回退时才计算
+        fell_back = False
+        for iter_num in range(max_iter):
+            try:
+                e_sat = calculate_esat(T_w,name)
+                gamma = 0.000667*(1+0.00115*T_w)*P
+                f = e_sat-gamma*(T-T_w)-e
+                if f > 0:
+                    hi,f_hi = T_w,f
+                else:
+                    lo,f_lo = T_w,f
+                if ftol is not None and abs(f) < ftol:
+                    T_w_new = T_w  # 残差已足够小，不必再求导
+                else:
+                    de_dT = calculate_dedt(T_w,name,P)
+                    df_dT = de_dT+gamma-0.000667*0.00115*P*(T-T_w)
+                    T_w_new = T_w-f/df_dT
+                if bracketed and f == f and not lo-tol <= T_w_new <= hi+tol:
+                    if f_hi is None:
+                        f_hi = calculate_esat(T,name)-e
+                    T_w_new = _fallback(lo,hi,f_lo,f_hi,fell_back)
+                    fell_back = True
+                    calculator.fallbacks += 1
+                else:
+                    fell_back = False
+                calculator.add_iteration(name,iter_num+1,T_w,abs(f))
+
+                if abs(T_w_new-T_w) < tol and iter_num+1 >= min_iter:
+                    last_rh = e/calculate_esat(T,name)
+                    if 1 >= last_rh >= 0:
+                        calculator.add_result(name,T_w_new,rh=last_rh)
+                        break
+                    else:
+                        calculator.add_status(name,STATUS_UNPHYSICAL)
+                        break
+
+                elif not bracketed and abs(f) > 1e3:
+                    calculator.add_status(name,STATUS_RESIDUAL)
+                    break
+
+                T_w = T_w_new
+
+            except OverflowError:
+                calculator.add_status(name,STATUS_OVERFLOW)
+                break
+            except Exception as e:
+                calculator.add_status(name,STATUS_FAILED,f'错误: {str(e)}')
+                break
+            except:
+                calculator.add_status(name,STATUS_FAILED)
+                break
+        else:
+            calculator.add_status(name,STATUS_NOT_CONVERGED)
+            calculator.add_iteration(name,max_iter,T_w,abs(f))
+
+    return calculator
+
+def calculate_dewpoint(T_g,T_w,P,max_iter=500,tol=1e-6,formulas=None,trace=False):
+    calculator = CalculatorMemory(trace)
+    for name,condition in select_methods(formulas):
+        if not condition(T_w) and not condition(T_g):
+            calculator.add_status(name,STATUS_NOT_APPLICABLE)
+            continue
+
+        es_wet = calculate_esat(T_w,name)
+        es_dry = calculate_esat(T_g,name)
+        gamma = 0.000667*(1+0.00115*T_w)*P
+        e = es_wet-gamma*(T_g-T_w)
+        rh = e/es_dry
+        if e >= es_dry or rh >= 1:
+            calculator.add_result(name,T_g,rh=1)
+        else:
+            try:
+                Td = esat_calculate(e,name,max_iter,tol)
+                calculator.add_result(name,Td,rh=rh)
+            except ZeroDivisionError:
+                Td = T_g
+                calculator.add_result(name,Td,rh=rh)
+            except:
+                calculator.add_status(name,STATUS_FAILED)
+    return calculator
+
+def calculate_both(initial_guess, T_g, rh, P=1013.25, max_iter=50, tol=1e-6, formulas=None, trace=False,
+                   min_iter=MIN_ITER_LEGACY, ftol=None):
+    # initial_guess为None时以反解出的露点作为湿球初值；min_iter、ftol见calculate_wetbulb
+    calculator = CalculatorMemory(trace)
+    rh_decimal = rh / 100
+    for name, condition in select_methods(formulas):
+        if not condition(T_g):
+            calculator.add_status(name, STATUS_NOT_APPLICABLE)
+            continue
+            
+        try:
+            es_dry = calculate_esat(T_g, name)
+            e = es_dry * rh_decimal
+            Td = esat_calculate(e, name, max_iter, tol)
+            T_w = Td if initial_guess is None else initial_guess
+            # 湿球的区间保护同calculate_wetbulb
+            bracketed = Td <= T_g
+            if bracketed:
+                T_w = min(max(T_w, Td), T_g)
+            lo, hi = Td, T_g
+            f_lo, f_hi = -0.000667 * (1 + 0.00115 * Td) * P * (T_g - Td), es_dry - e
+            fell_back = False
+            for iter_num in range(max_iter):
+                e_sat = calculate_esat(T_w, name)
+                gamma = 0.000667 * (1 + 0.00115 * T_w) * P
+                f = e_sat - gamma * (T_g - T_w) - e
+                if f > 0:
+                    hi, f_hi = T_w, f
+                else:
+                    lo, f_lo = T_w, f
+                if ftol is not None and abs(f) < ftol:
+                    T_w_new = T_w
+                else:
+                    de_dT = calculate_dedt(T_w, name, P)
+                    df_dT = de_dT + gamma - 0.000667 * 0.00115 * P * (T_g - T_w)
+                    T_w_new = T_w - f / df_dT
+                if bracketed and f == f and not lo - tol <= T_w_new <= hi + tol:
+                    T_w_new = _fallback(lo, hi, f_lo, f_hi, fell_back)
+                    fell_back = True
+                    calculator.fallbacks += 1
+                else:
+                    fell_back = False
+                calculator.add_iteration(name, iter_num+1, T_w, abs(f))
+                
+                if abs(T_w_new - T_w) < tol and iter_num+1 >= min_iter:
+                    calculator.add_result(name, Td, T_w_new)
+                    break
+                elif not bracketed and abs(f) > 1e3:
+                    calculator.add_result(name, Td, status2=STATUS_RESIDUAL)
+                    break
+                    
+                T_w = T_w_new
+            else:
+                calculator.add_result(name, Td, status2=STATUS_NOT_CONVERGED)
+                
+        except OverflowError:
+            calculator.add_status(name, STATUS_OVERFLOW)
+        except Exception as e:
+            calculator.add_status(name, STATUS_FAILED, f'错误: {str(e)}')
+        except:
+            calculator.add_status(name, STATUS_FAILED)
+            
+    return calculator
+
+class MethodResult:
+    # 单个公式的计算结果；状态以整数保存，只在显示时转换为文字
+    __slots__ = ('method', 'value1', 'value2', 'rh', 'status', 'status2', 'detail')
+
+    def __init__(self, method, value1=None, value2=None, rh=None, status=STATUS_OK, status2=STATUS_OK, detail=None):
+        self.method = method
+        self.value1 = value1
+        self.value2 = value2
+        self.rh = rh
+        self.status = status
+        self.status2 = status2  # 同时求露点和湿球时湿球部分的状态
+        self.detail = detail
+
+    @property
+    def result1(self):
+        # 成功时为数值，否则为状态说明
+        if self.status == STATUS_OK:
+            return self.value1
+        return self.detail or STATUS_MESSAGES[self.status]
+
+    @property
+    def result2(self):
+        if self.status2 != STATUS_OK:
+            return '湿球' + STATUS_MESSAGES[self.status2]
+        return self.value2
+
+TRACE_CAPACITY = 1024
+
+class CalculatorMemory:
+    # trace为True时把每次迭代记录到预先分配的环形缓冲区，写满后覆盖最早的记录
+    __slots__ = ('methods', 'fallbacks', '_trace_names', '_trace_method', '_trace_iteration', '_trace_T',
+                 '_trace_residual', '_trace_next', '_trace_count')
+
+    def __init__(self, trace=False, capacity=TRACE_CAPACITY):
+        self.methods = []
+        self.fallbacks = 0  # 湿球迭代中牛顿步越出区间而改用试位（弦截）或二分步的次数，供诊断
+        self._trace_names = {} if trace else None
+        if trace:
+            self._trace_method = array('h', bytes(2 * capacity))
+            self._trace_iteration = array('i', bytes(4 * capacity))
+            self._trace_T = array('d', bytes(8 * capacity))
+            self._trace_residual = array('d', bytes(8 * capacity))
+        self._trace_next = 0
+        self._trace_count = 0
+
+    @property
+    def tracing(self):
+        return self._trace_names is not None
+
+    def add_result(self, method_name, result1, result2=None, rh=None, status2=STATUS_OK):
+        self.methods.append(MethodResult(method_name, result1, result2, rh, STATUS_OK, status2))
+
+    def add_status(self, method_name, status, detail=None):
+        self.methods.append(MethodResult(method_name, status=status, detail=detail))
+
+    def statistics(self, which=1):
+        # 成功的各公式结果（which=1为第一个结果，2为第二个）之间的均值、标准差、最小值、最大值、极差与公式数
+        # 同时求露点和湿球时湿球失败的公式两个结果都不计，与批量输出一致
+        values = [item.value1 if which == 1 else item.value2 for item in self.methods
+                  if item.status == STATUS_OK and item.status2 == STATUS_OK]
+        values = [value for value in values if value is not None]
+        if not values:
+            return None
+        mean = sum(values)/len(values)
+        low,high = min(values),max(values)
+        return {
+            'mean':mean,
+            'std':(sum((value-mean)**2 for value in values)/len(values))**0.5,
+            'min':low,
+            'max':high,
+            'spread':high-low,
+            'count':len(values),
+        }
+
+    def show_statistics(self, label, which=1, temperature_unit='℃'):
+        stats = self.statistics(which)
+        if stats is None:
+            return ""
+        scale = from_celsius(1.0, temperature_unit)-from_celsius(0.0, temperature_unit)
+        low,high = from_celsius(stats['min'], temperature_unit),from_celsius(stats['max'], temperature_unit)
+        return (f"{label}（{stats['count']}个公式）: 平均 {from_celsius(stats['mean'], temperature_unit):.4f}{temperature_unit}"
+                f"  标准差 {stats['std']*scale:.4f}  范围 {low:.4f}~{high:.4f}{temperature_unit}")
+
+    def show_results(self, mode1, mode2=None, temperature_unit='℃'):
+        if mode2:
+            output = f"计算公式 | {mode1} | {mode2}:\n"
+        else:
+            output = f"计算公式 | {mode1} | 相对湿度:\n"
+            
+        for item in self.methods:
+            if item.status == STATUS_OK:
+                display_temp1 = from_celsius(item.value1, temperature_unit)
+                result1_str = f"{display_temp1:.4f}{temperature_unit}"
+            else:
+                result1_str = f"{item.result1}"
+
+            if item.status == STATUS_OK and (item.value2 is not None or item.status2 != STATUS_OK):
+                if item.status2 == STATUS_OK:
+                    display_temp2 = from_celsius(item.value2, temperature_unit)
+                    result2_str = f"{display_temp2:.4f}{temperature_unit}"
+                else:
+                    result2_str = f"{item.result2}"
+
+                rh_str = ""
+                if item.rh == 0 :
+                    rh_str = ""
+                elif item.rh is not None:
+                    rh_str = f"  {item.rh*100:.2f}%"
+                    
+                output += f"{item.method}:  {result1_str}  {result2_str}  {rh_str}\n"
+            else:
+                if item.rh:
+                    rh = item.rh*100
+                    output += f"{item.method}:  {result1_str}  {rh:.2f}%\n"
+                else:
+                    output += f"{item.method}:  {result1_str}\n"
+
+        output += "点击任意行以继续…"
+        return output
+
+    def add_iteration(self,method,iteration,T_w,residual):
+        names = self._trace_names
+        if names is None:
+            return
+        index = names.setdefault(method, len(names))
+        i = self._trace_next
+        self._trace_method[i] = index
+        self._trace_iteration[i] = iteration
+        self._trace_T[i] = T_w
+        self._trace_residual[i] = abs(residual)
+        self._trace_next = (i + 1) % len(self._trace_T)
+        self._trace_count = min(self._trace_count + 1, len(self._trace_T))
+
+    @property
+    def iteration_data(self):
+        # 按时间顺序从环形缓冲区整理出各公式的迭代记录
+        data = {}
+        if self._trace_names is None:
+            return data
+        names = list(self._trace_names)
+        capacity = len(self._trace_T)
+        start = (self._trace_next - self._trace_count) % capacity
+        for k in range(self._trace_count):
+            i = (start + k) % capacity
+            item = data.setdefault(names[self._trace_method[i]], {'iterations':[], 'temperatures':[], 'residuals':[]})
+            item['iterations'].append(self._trace_iteration[i])
+            item['temperatures'].append(self._trace_T[i])
+            item['residuals'].append(self._trace_residual[i])
+        return data
+
+    def show_convergence(self):
+        import matplotlib.pyplot as plt  # 仅在绘图时加载
+        plt.rcParams['font.sans-serif'] = ['Microsoft YaHei']  # 指定默认字体
+        plt.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
+
+        plt.figure(figsize=(12,6))
+        plt.subplot(1,2,1)   # 温度变化子图
+        for method,data in self.iteration_data.items():
+            if len(data['iterations']) <= 1:
+                continue  # 跳过只有一次迭代的数据
+                
+            iterations = data['iterations'][1:]   # 跳过第一次迭代（索引0对应的数据）
+            temperatures = data['temperatures'][1:]
+            plt.plot(iterations,temperatures,
+                     marker='o',label=method)
+        plt.xlabel('迭代次数')
+        plt.ylabel('温度估计值 (°C)')
+        plt.title('温度迭代过程')
+        plt.grid(True)
+        plt.legend()
+
+        plt.subplot(1,2,2)          # 残差变化子图
+        for method,data in self.iteration_data.items():
+            if len(data['iterations']) <= 1:
+                continue  # 跳过只有一次迭代的数据
+                
+            iterations = data['iterations'][1:]
+            residuals = data['residuals'][1:]
+            plt.semilogy(iterations,residuals,
+                         marker='s',label=method)
+        plt.xlabel('迭代次数')
+        plt.ylabel('残差 (对数刻度)')
+        plt.title('残差收敛过程')
+        plt.grid(True)
+        plt.legend()
+
+        plt.tight_layout()
+        plt.show()
@@ -0,0 +1,144 @@
+# 结果库：把批量计算的结果按输入保存在SQLite文件中，以后的批量计算先查库，只求解库中没有的行
+# 一行输入(A,B,C)按resolution取整为整数作为键；计算模式、单位、公式、精度、后端、追加列等选项与软件版本
+# 合成一个选项组，在options表中编号，结果表以(选项组, A, B, C)为主键（WITHOUT ROWID，键即索引，无额外的行号索引）
+# 值为该行全部结果列的float64字节串，失败的结果（nan）同样保存
+#
+# 输入在键空间中随机分布，逐块直接插入主键表时每块都要改写几乎所有叶子页，表越大越慢；
+# 因此新结果先追加到无索引的staging表，积累到flush_rows行或关闭时再按主键顺序一次并入results表，
+# 每个叶子页每次合并只改写一次。staging中的结果在合并前查不到
+import sqlite3
+
+import numpy as np
+
+from .cache import DEFAULT_RESOLUTION
+
+SCHEMA_VERSION = 1
+FLUSH_ROWS = 1000000
+
+class ResultStore:
+    def __init__(self, path, resolution=DEFAULT_RESOLUTION, flush_rows=FLUSH_ROWS):
+        from . import __version__
+
+        self.path = path
+        self.resolution = resolution
+        self.version = f'{__version__}/{SCHEMA_VERSION}'
+        self.hits = 0
+        self.misses = 0
+        self.inserted = 0
+        self.flush_rows = flush_rows
+        self._staged = 0
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS options (
+                id INTEGER PRIMARY KEY,
+                mode INTEGER NOT NULL,
+                options TEXT NOT NULL,
+                version TEXT NOT NULL,
+                columns INTEGER NOT NULL,
+                UNIQUE (mode, options, version)
+            );
+            CREATE TABLE IF NOT EXISTS results (
+                option_id INTEGER NOT NULL,
+                a INTEGER NOT NULL,
+                b INTEGER NOT NULL,
+                c INTEGER NOT NULL,
+                value BLOB NOT NULL,
+                PRIMARY KEY (option_id, a, b, c)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS staging (option_id INTEGER, a INTEGER, b INTEGER, c INTEGER, value BLOB);
+            CREATE TEMP TABLE lookup (i INTEGER PRIMARY KEY, a INTEGER, b INTEGER, c INTEGER);
+        ''')
+        self._conn.commit()
+        self.flush()  # 上次未合并完的结果
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+    def flush(self):
+        # 把staging中的结果按主键顺序并入results表，已有的键保持不变
+        with self._conn:
+            cursor = self._conn.execute('''
+                INSERT OR IGNORE INTO results (option_id, a, b, c, value)
+                SELECT option_id, a, b, c, value FROM staging ORDER BY option_id, a, b, c''')
+            self._conn.execute('DELETE FROM staging')
+        # 合并写出的WAL很大，写回数据库文件并截断，否则之后的查询都要先在WAL中查找
+        self._conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        self.inserted += max(cursor.rowcount, 0)
+        self._staged = 0
+
+    def option_id(self, mode, options, columns):
+        # options为可repr的选项元组；同一选项组的结果列数必须一致
+        text = repr(options)
+        row = self._conn.execute('SELECT id, columns FROM options WHERE mode=? AND options=? AND version=?',
+                                 (mode, text, self.version)).fetchone()
+        if row is None:
+            cursor = self._conn.execute('INSERT INTO options (mode, options, version, columns) VALUES (?, ?, ?, ?)',
+                                        (mode, text, self.version, columns))
+            self._conn.commit()
+            return cursor.lastrowid
+        if row[1] != columns:
+            raise ValueError("结果库中该选项组的列数与本次计算不一致")
+        return row[0]
+
+    def _keys(self, A, B, C):
+        # 返回可作为键的行（输入均为有限值）的下标及取整后的整数键
+        A, B, C = (np.asarray(values, dtype=float) for values in (A, B, C))
+        rows = np.flatnonzero(np.isfinite(A) & np.isfinite(B) & np.isfinite(C))
+        keys = np.rint(np.column_stack((A[rows], B[rows], C[rows])) / self.resolution).astype(np.int64)
+        return rows, keys
+
+    def get_many(self, option_id, A, B, C, columns):
+        # 返回(形状为(columns, 行数)的结果数组, 是否命中的布尔数组)，未命中的位置为nan
+        n = len(A)
+        values = np.full((columns, n), np.nan)
+        found = np.zeros(n, dtype=bool)
+        rows, keys = self._keys(A, B, C)
+        if len(rows):
+            conn = self._conn
+            conn.execute('DELETE FROM lookup')
+            conn.executemany('INSERT INTO lookup VALUES (?, ?, ?, ?)',
+                             zip(rows.tolist(), *keys.T.tolist()))
+            matched = conn.execute('''
+                SELECT lookup.i, results.value FROM lookup
+                JOIN results ON results.option_id=? AND results.a=lookup.a AND results.b=lookup.b
+                    AND results.c=lookup.c''', (option_id,)).fetchall()
+            if matched:
+                index = np.array([i for i, _ in matched])
+                values[:, index] = np.frombuffer(b''.join(value for _, value in matched)).reshape(-1, columns).T
+                found[index] = True
+        hits = int(found.sum())
+        self.hits += hits
+        self.misses += len(rows) - hits
+        return values, found
+
+    def put_many(self, option_id, A, B, C, values):
+        # values的形状为(列数, 行数)；整批在一个事务中追加到staging表
+        rows, keys = self._keys(A, B, C)
+        if not len(rows):
+            return
+        data = np.ascontiguousarray(np.asarray(values, dtype=np.float64)[:, rows].T)
+        with self._conn:
+            self._conn.executemany('INSERT INTO staging VALUES (?, ?, ?, ?, ?)',
+                                   zip([option_id] * len(rows), *keys.T.tolist(), [row.tobytes() for row in data]))
+        self._staged += len(rows)
+        if self._staged >= self.flush_rows:
+            self.flush()
+
+    def count(self, option_id=None):
+        if option_id is None:
+            return self._conn.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        return self._conn.execute('SELECT COUNT(*) FROM results WHERE option_id=?', (option_id,)).fetchone()[0]
+
+    def summary(self):
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return f"结果库命中 {self.hits}/{total}（{rate:.1%}），新写入 {self.inserted} 条"
@@ -0,0 +1,125 @@
+# 查表后端：在各公式适用范围上预先计算e_sat与de/dT，用三次Hermite插值代替逐点计算公式
+# 表格首次使用时建立并缓存到磁盘（默认~/.cache/wetbulb，可用环境变量WETBULB_CACHE_DIR指定）
+#
+# 默认步长0.05℃时，在适用范围内相对精确公式的最大相对误差：
+#   e_sat  < 1e-9
+#   de/dT  < 1e-6
+# 每张表建立时都会在网格中点与四分点上实测误差，记录在max_rel_error/max_rel_error_dedt中
+import os
+
+import numpy as np
+
+from .config import cache_dir
+from .formulas import METHOD_RANGES, METHOD_IDS
+
+DEFAULT_STEP = 0.05
+MARGIN = 1.0  # 网格在适用范围两侧各多出的温度（℃），使迭代过程中略出界的点仍可查表
+TABLE_VERSION = 1
+
+_tables = {}
+
+def _exact():
+    from .vector import calculate_esat_array, calculate_dedt_array
+    return calculate_esat_array, calculate_dedt_array
+
+class ESatTable:
+    def __init__(self, method, T0, step, e, dedt):
+        self.method = method
+        self.T0 = T0
+        self.step = step
+        self.e = e
+        self.dedt = dedt
+        self.T1 = T0 + step * (len(e) - 1)
+        self.max_rel_error = None
+        self.max_rel_error_dedt = None
+        # 每个区间的Hermite多项式系数，按行存放使一次查表只取一行
+        # 末尾补一行只含端点值与斜率，T恰好等于T1时不必另行截断下标
+        y0, y1 = e[:-1], e[1:]
+        m0, m1 = dedt[:-1] * step, dedt[1:] * step
+        coef = np.stack([y0, m0, 3*(y1 - y0) - 2*m0 - m1, 2*(y0 - y1) + m0 + m1], axis=1)
+        self.coef = np.vstack([coef, [e[-1], dedt[-1] * step, 0.0, 0.0]])
+
+    @classmethod
+    def build(cls, method, step=DEFAULT_STEP):
+        esat, dedt = _exact()
+        lo, hi = METHOD_RANGES[method]
+        n = int(np.ceil((hi - lo + 2 * MARGIN) / step)) + 1
+        T = lo - MARGIN + step * np.arange(n)
+        table = cls(method, lo - MARGIN, step, esat(T, method), dedt(T, method))
+        table.measure_error()
+        return table
+
+    def measure_error(self):
+        # 在适用范围内的网格中点与四分点上与精确公式比较
+        esat, dedt = _exact()
+        lo, hi = METHOD_RANGES[self.method]
+        T = np.arange(lo, hi, self.step)
+        T = np.concatenate([T + self.step * 0.25, T + self.step * 0.5, T + self.step * 0.75])
+        T = T[T <= hi]
+        self.max_rel_error = float(np.max(np.abs(self.evaluate(T) / esat(T, self.method) - 1)))
+        self.max_rel_error_dedt = float(np.max(np.abs(self.evaluate(T, 1) / dedt(T, self.method) - 1)))
+
+    def contains(self, T):
+        return (T >= self.T0) & (T <= self.T1)
+
+    def evaluate(self, T, which=0):
+        # which=0返回e_sat，which=1返回插值多项式的导数de/dT；T须在网格范围内
+        x = (T - self.T0) * (1 / self.step)
+        i = x.astype(np.intp)
+        t = x - i
+        c = self.coef.take(i, axis=0, mode='clip')
+        if which == 0:
+            return c[:, 0] + t * (c[:, 1] + t * (c[:, 2] + t * c[:, 3]))
+        return (c[:, 1] + t * (2 * c[:, 2] + 3 * t * c[:, 3])) / self.step
+
+    @staticmethod
+    def path(method, step=DEFAULT_STEP):
+        return os.path.join(cache_dir(), f'esat_{METHOD_IDS[method]:02d}_{step:g}_v{TABLE_VERSION}.npz')
+
+    def save(self):
+        os.makedirs(cache_dir(), exist_ok=True)
+        path = self.path(self.method, self.step)
+        tmp = path + '.tmp.npz'
+        np.savez(tmp, T0=self.T0, step=self.step, e=self.e, dedt=self.dedt,
+                 max_rel_error=self.max_rel_error, max_rel_error_dedt=self.max_rel_error_dedt)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, method, step=DEFAULT_STEP):
+        with np.load(cls.path(method, step)) as data:
+            table = cls(method, float(data['T0']), float(data['step']), data['e'], data['dedt'])
+            table.max_rel_error = float(data['max_rel_error'])
+            table.max_rel_error_dedt = float(data['max_rel_error_dedt'])
+        return table
+
+def get_table(method, step=DEFAULT_STEP):
+    # 依次查找内存、磁盘缓存，都没有时建立新表并尝试写入磁盘
+    key = (method, step)
+    if key not in _tables:
+        try:
+            table = ESatTable.load(method, step)
+        except (OSError, KeyError, ValueError):
+            table = ESatTable.build(method, step)
+            try:
+                table.save()
+            except OSError:
+                pass
+        _tables[key] = table
+    return _tables[key]
+
+def _lookup(T, method, which):
+    # 网格外的点退回精确公式
+    table = get_table(method)
+    inside = table.contains(T)
+    if inside.all():
+        return table.evaluate(T, which)
+    out = np.empty(T.shape)
+    out[inside] = table.evaluate(T[inside], which)
+    out[~inside] = _exact()[which](T[~inside], method)
+    return out
+
+def esat_kernel(T_w, method):
+    return _lookup(T_w, method, 0)
+
+def dedt_kernel(T_w, method):
+    return _lookup(T_w, method, 1)
@@ -0,0 +1,50 @@
+# 单位换算，计算核心内部统一使用℃和hPa；对标量和数组均适用
+
+TEMPERATURE_UNITS = ('℃', 'K', '℉')
+PRESSURE_UNITS = ('hPa', 'Pa', 'mmHg', 'cmHg', 'bar')
+
+# 输入有效范围（℃、hPa）
+TEMP_MIN = -150
+TEMP_MAX = 200
+PRESSURE_MIN = 500
+PRESSURE_MAX = 1100
+
+# 探空剖面的有效气压范围（hPa），覆盖到平流层下部
+PROFILE_PRESSURE_MIN = 10
+PROFILE_PRESSURE_MAX = 1100
+
+def to_celsius(temperature, unit):
+    if unit == 'K':
+        return temperature - 273.15
+    elif unit == '℉':
+        return (temperature - 32) * 5/9
+    return temperature
+
+def from_celsius(temperature, unit):
+    if unit == 'K':
+        return temperature + 273.15
+    elif unit == '℉':
+        return temperature * 9/5 + 32
+    return temperature
+
+def to_hpa(P, unit):
+    if unit == 'Pa':
+        return P / 100
+    elif unit == 'mmHg':
+        return P * 1.33322
+    elif unit == 'cmHg':
+        return P * 13.3322
+    elif unit == 'bar':
+        return P * 1000
+    return P
+
+def from_hpa(P, unit):
+    if unit == 'Pa':
+        return P * 100
+    elif unit == 'mmHg':
+        return P / 1.33322
+    elif unit == 'cmHg':
+        return P / 13.3322
+    elif unit == 'bar':
+        return P / 1000
+    return P
@@ -0,0 +1,357 @@
+# 数组版计算核心，整列/整个数组一次性求解
+import math
+
+import numpy as np
+
+from .formulas import MAGNUS_FORMULAS,GOFF_FORMULAS,WEXLER_FORMULAS,METHOD_RANGES,METHOD_NAMES,METHOD_IDS
+from .solver import (STATUS_OK,STATUS_NOT_APPLICABLE,STATUS_UNPHYSICAL,STATUS_RESIDUAL,
+                     STATUS_NOT_CONVERGED,STATUS_OVERFLOW,STATUS_FAILED)
+
+METHOD_MIN = np.array([METHOD_RANGES[name][0] for name in METHOD_NAMES],dtype=float)
+METHOD_MAX = np.array([METHOD_RANGES[name][1] for name in METHOD_NAMES],dtype=float)
+_ICE = np.array([name.endswith('冰面') for name in METHOD_NAMES])
+
+def _esat_kernel(T_w,method):
+    # 与calculate_esat逐项相同的数组实现
+    T_k = T_w+273.15
+
+    if method in MAGNUS_FORMULAS:
+        A,B,C = MAGNUS_FORMULAS[method](T_w)
+        return A*np.exp(B*T_w/(C+T_w))
+
+    elif method in GOFF_FORMULAS:
+        A,B,C,D,E,F,G,H,I = GOFF_FORMULAS[method](T_w)
+        term1 = B*(1-A/T_k)
+        term2 = C*np.log10(T_k/A)
+        term3 = D*(1-10**(E*(T_k/A-1)))
+        term4 = F*(10**(G*(1-A/T_k))-1)
+        term5 = I*(1-T_k/A)
+        return 10**(term1+term2+term3+term4+term5+H)
+
+    elif method in WEXLER_FORMULAS:
+        A,B,C,D,E,F,G = WEXLER_FORMULAS[method](T_w)
+        term1 = A/T_k
+        term2 = B
+        term3 = C*T_k
+        term4 = D*T_k**2
+        term5 = E*T_k**3
+        term6 = F*T_k**4
+        term7 = G*np.log(T_k)
+        ln_esat = term1+term2+term3+term4+term5+term6+term7
+        return np.exp(ln_esat)/100
+
+    elif method == 'Gili-水面':
+        term1 = -3.142305*(1e3/T_k-1e3/373.16)
+        term2 = 8.2*np.log10(373.16/T_k)
+        term3 = -0.0024804*(373.16-T_k)
+        return 980.66*10**(0.00141966+term1+term2+term3)
+
+    elif method == 'Marti-冰面':
+        lg_esat = -2663.5/T_k+12.537
+        return 10**lg_esat/100
+
+    else:
+        raise ValueError("无效的计算方法")
+
+def _method_ids(method,shape):
+    # 公式名或逐元素公式编号（METHOD_IDS）广播为编号数组
+    if isinstance(method,str):
+        if method not in METHOD_IDS:
+            raise ValueError("无效的计算方法")
+        return np.full(shape,METHOD_IDS[method],dtype=np.intp)
+    ids = np.broadcast_to(np.asarray(method,dtype=np.intp),shape)
+    if ids.size and (ids.min() < 0 or ids.max() >= len(METHOD_NAMES)):
+        raise ValueError("无效的计算方法")
+    return ids
+
+def _dispatch(kernel,T_w,method):
+    # 按公式分组调用kernel，单一公式时不做分组
+    if isinstance(method,str):
+        return kernel(T_w,method)
+    T_w,ids = np.broadcast_arrays(T_w,np.asarray(method))
+    ids = _method_ids(ids,T_w.shape)
+    out = np.empty(T_w.shape)
+    for mid in np.unique(ids):
+        mask = ids == mid
+        out[mask] = kernel(T_w[mask],METHOD_NAMES[mid])
+    return out
+
+# 可选的计算后端：exact为精确公式，table为查表插值（见tables.py），poly为分段多项式（见poly.py）
+BACKENDS = ('exact','table','poly')
+
+def _kernels(backend):
+    # 返回(e_sat核函数,de/dT核函数)，非精确后端在首次使用时才加载
+    if backend == 'exact':
+        return _esat_kernel,_dedt_kernel
+    elif backend == 'table':
+        from .tables import esat_kernel,dedt_kernel
+        return esat_kernel,dedt_kernel
+    elif backend == 'poly':
+        from .poly import esat_kernel,dedt_kernel
+        return esat_kernel,dedt_kernel
+    raise ValueError("无效的计算后端")
+
+def calculate_esat_array(T_w,method='Magnus-水面',backend='exact'):
+    # 数组版calculate_esat：method可为公式名或逐元素的公式编号数组
+    with np.errstate(over='ignore',invalid='ignore',divide='ignore'):
+        return _dispatch(_kernels(backend)[0],np.asarray(T_w,dtype=float),method)
+
+def _dedt_kernel(T_w,method):
+    # 与calculate_dedt逐项相同的数组实现
+    T_k = T_w+273.15
+
+    if method in MAGNUS_FORMULAS:
+        A,B,C = MAGNUS_FORMULAS[method](T_w)
+        e_sat = _esat_kernel(T_w,method)
+        return e_sat*(B*C)/(C+T_w)**2
+
+    elif method in GOFF_FORMULAS:
+        A,B,C,D,E,F,G,H,I = GOFF_FORMULAS[method](T_w)
+        term1 = B*A/T_k**2
+        term2 = C/(T_k*math.log(10))
+        term3 = -D*E/A*math.log(10)*10**(E*(T_k/A-1))
+        term4 = A*F*G/T_k**2*10**(G*(1-A/T_k))*math.log(10)
+        term5 = -I/A
+        e_sat = _esat_kernel(T_w,method)
+        return e_sat*math.log(10)*(term1+term2+term3+term4+term5)
+
+    elif method in WEXLER_FORMULAS:
+        e_sat = _esat_kernel(T_w,method)
+        A,B,C,D,E,F,G = WEXLER_FORMULAS[method](T_w)
+        d_sat = -A/T_k**2+C+2*D*T_k+3*E*T_k**2+4*F*T_k**3+G/T_k
+        return e_sat*d_sat
+
+    elif method == 'Gili-水面':
+        term1 = -3.142305*(1e3/T_k-1e3/373.16)
+        term2 = 8.2*np.log10(373.16/T_k)
+        term3 = -0.0024804*(373.16-T_k)
+        term4 = 3142.305/T_k**2-3.561215/T_k+0.0024804
+        return 980.66*10**(0.00141966+term1+term2+term3)*math.log(10)*term4
+
+    elif method == 'Marti-冰面':
+        lg_esat = -2663.5/T_k+12.537
+        return 10**lg_esat/100*math.log(10)*2663.5/T_k**2
+
+    else:
+        raise ValueError("无效的计算方法")
+
+def calculate_dedt_array(T_w,method='Magnus-水面',backend='exact'):
+    # 数组版calculate_dedt，method与backend的含义同calculate_esat_array
+    with np.errstate(over='ignore',invalid='ignore',divide='ignore'):
+        return _dispatch(_kernels(backend)[1],np.asarray(T_w,dtype=float),method)
+
+def _magnus_seed(e,ids):
+    # 用Magnus闭式解作为反解初值，冰面公式用冰面系数
+    B = np.where(_ICE[ids],22.46,17.62)
+    C = np.where(_ICE[ids],272.62,243.12)
+    term1 = np.log(e/6.112)
+    return C*term1/(B-term1)
+
+def esat_inverse_array(e,method='Goff-水面',max_iter=50,tol=1e-6,mint=-150,maxt=200,backend='exact'):
+    # 由水汽压反解温度：Magnus闭式初值+带区间保护的牛顿迭代（解析导数）
+    # 牛顿步越出当前区间时退回二分，返回(温度,迭代次数)
+    e = np.asarray(e,dtype=float)
+    shape = e.shape
+    ids = _method_ids(method,shape).ravel()
+    e = e.ravel()
+    single = method if isinstance(method,str) else None
+    iterations = np.zeros(e.size,dtype=np.intp)
+
+    with np.errstate(over='ignore',invalid='ignore',divide='ignore'):
+        ln_e = np.log(e)
+        T = np.clip(_magnus_seed(e,ids),mint,maxt)
+        T[~np.isfinite(ln_e)] = np.nan
+        lo = np.full(e.size,float(mint))
+        hi = np.full(e.size,float(maxt))
+        # Magnus类公式直接用各自的闭式解
+        magnus = np.zeros(e.size,dtype=bool)
+        for name in MAGNUS_FORMULAS:
+            mask = ids == METHOD_IDS[name]
+            if mask.any():
+                A,B,C = MAGNUS_FORMULAS[name](e)
+                term1 = np.log(e[mask]/A)
+                T[mask] = C*term1/(B-term1)
+                magnus |= mask
+        idx = np.flatnonzero(np.isfinite(ln_e) & ~magnus)
+
+        for _ in range(max_iter):
+            if not idx.size:
+                break
+            sub = single or ids[idx]
+            T_i = T[idx]
+            e_sat = calculate_esat_array(T_i,sub,backend)
+            g = np.log(e_sat)-ln_e[idx]
+            hi[idx] = np.where(g > 0,T_i,hi[idx])
+            lo[idx] = np.where(g > 0,lo[idx],T_i)
+            T_new = T_i-g*e_sat/calculate_dedt_array(T_i,sub,backend)
+            outside = ~((T_new >= lo[idx]) & (T_new <= hi[idx]))
+            T_new[outside] = (lo[idx][outside]+hi[idx][outside])/2
+            iterations[idx] += 1
+            T[idx] = T_new
+            idx = idx[~((np.abs(T_new-T_i) < tol) | (g == 0))]
+
+    return T.reshape(shape),iterations.reshape(shape)
+
+def _bracket(T_d,T,P,e,e_T):
+    # 湿球的有根区间[Td,T]及两端的f值：f(Td)=-γ(Td)(T-Td)，f(T)=e_sat(T)-e，见solver中的说明
+    # Td>T或缺值的元素不设区间（上下限为±inf）
+    bracketed = T_d <= T
+    return (np.where(bracketed,T_d,-np.inf),np.where(bracketed,T,np.inf),
+            -0.000667*(1+0.00115*T_d)*P*(T-T_d),e_T-e)
+
+def _newton_wetbulb(T_w,T,e,P,ids,single,max_iter,tol,status,iterations,backend,min_iter=0,ftol=None,
+                    bracket=None,stats=None):
+    # 对idx内的元素同时做牛顿迭代，收敛、残差过大或溢出的元素立即冻结
+    # 停止条件见solver.MIN_ITER_LEGACY：逐元素判断步长与残差，min_iter对所有元素相同
+    # bracket为_bracket给出的区间，越出区间的牛顿步按solver中说明的规则改取弦交点或中点；
+    # 有区间的元素不做残差过大的判断。stats为字典时在其'fallbacks'中累加回退的次数
+    # 返回收敛元素的(下标,湿球温度)，其余元素的状态直接写入status
+    if bracket is None:
+        bracket = (np.full(T.size,-np.inf),np.full(T.size,np.inf),np.zeros(T.size),np.zeros(T.size))
+    idx = np.flatnonzero(np.isfinite(T_w))
+    status[~np.isfinite(T_w)] = STATUS_FAILED
+    T_w,e = T_w[idx],e[idx]
+    lo,hi,f_lo,f_hi = (values[idx] for values in bracket)
+    fell_back = np.zeros(idx.size,dtype=bool)
+    done_idx,done_T_w = [],[]
+    fallbacks = 0
+    for iter_num in range(max_iter):
+        if not idx.size:
+            break
+        sub = single or ids[idx]
+        T_i,P_i = T[idx],P[idx]
+        e_sat = calculate_esat_array(T_w,sub,backend)
+        gamma = 0.000667*(1+0.00115*T_w)*P_i
+        f = e_sat-gamma*(T_i-T_w)-e
+        need = slice(None) if ftol is None else ~(np.abs(f) < ftol)  # 残差已小于ftol的元素原地不动，不再求导
+        T_w_new = T_w.copy()
+        T_n = T_w[need]
+        de_dT = calculate_dedt_array(T_n,sub if single else sub[need],backend)
+        df_dT = de_dT+gamma[need]-0.000667*0.00115*P_i[need]*(T_i[need]-T_n)
+        T_w_new[need] = T_n-f[need]/df_dT
+        bracketed = np.isfinite(lo)
+        upper = bracketed & (f > 0)
+        lower = bracketed & ~(f > 0)
+        hi,f_hi = np.where(upper,T_w,hi),np.where(upper,f,f_hi)
+        lo,f_lo = np.where(lower,T_w,lo),np.where(lower,f,f_lo)
+        outside = bracketed & np.isfinite(f) & ~((T_w_new >= lo-tol) & (T_w_new <= hi+tol))
+        if outside.any():
+            l,h,fl,fh = lo[outside],hi[outside],f_lo[outside],f_hi[outside]
+            T_c = l-fl*(h-l)/(fh-fl)
+            T_w_new[outside] = np.where((T_c > l) & (T_c < h) & ~fell_back[outside],T_c,(l+h)/2)
+            fallbacks += int(outside.sum())
+        fell_back = outside
+        iterations[idx] = iter_num+1
+
+        overflow = ~np.isfinite(T_w_new)
+        converged = ~overflow & (np.abs(T_w_new-T_w) < tol) & (iter_num+1 >= min_iter)
+        residual = ~overflow & ~converged & ~bracketed & (np.abs(f) > 1e3)
+
+        done_idx.append(idx[converged])
+        done_T_w.append(T_w_new[converged])
+        status[idx[converged]] = STATUS_OK
+        status[idx[residual]] = STATUS_RESIDUAL
+        status[idx[overflow]] = STATUS_OVERFLOW
+
+        active = ~(converged|residual|overflow)
+        idx,T_w,e = idx[active],T_w_new[active],e[active]
+        lo,hi,f_lo,f_hi,fell_back = lo[active],hi[active],f_lo[active],f_hi[active],fell_back[active]
+
+    if stats is not None:
+        stats['fallbacks'] = stats.get('fallbacks',0)+fallbacks
+    if not done_idx:
+        return np.zeros(0,dtype=np.intp),np.zeros(0)
+    return np.concatenate(done_idx),np.concatenate(done_T_w)
+
+def _prepare(method,*arrays):
+    arrays = np.broadcast_arrays(*(np.asarray(x,dtype=float) for x in arrays))
+    shape = arrays[0].shape
+    ids = _method_ids(method,shape).ravel()
+    single = method if isinstance(method,str) else None
+    return shape,ids,single,[x.ravel() for x in arrays]
+
+def calculate_wetbulb_array(initial_guess,T,Td,P=1013.25,method='Goff-水面',max_iter=50,tol=1e-6,backend='exact',
+                            min_iter=0,ftol=None,stats=None):
+    # calculate_wetbulb的数组版：所有元素同时迭代，收敛的元素即被冻结
+    # 默认不设最少迭代次数，min_iter=MIN_ITER_LEGACY时与标量版的停止条件相同
+    # 初值限制在[Td,T]内，越出区间的牛顿步改为试位或二分；stats为字典时在其'fallbacks'中累加回退的次数
+    # 返回(湿球温度,相对湿度,迭代次数,状态码)，失败元素的温度与湿度为nan
+    shape,ids,single,(T,Td,P,guess) = _prepare(method,T,Td,P,initial_guess)
+    T_w_out = np.full(T.size,np.nan)
+    rh_out = np.full(T.size,np.nan)
+    iterations = np.zeros(T.size,dtype=np.intp)
+    status = np.full(T.size,STATUS_NOT_CONVERGED,dtype=np.int8)
+
+    with np.errstate(over='ignore',invalid='ignore',divide='ignore'):
+        e = calculate_esat_array(Td,method,backend)
+        e_T = calculate_esat_array(T,method,backend)
+        bracket = _bracket(Td,T,P,e,e_T)
+        applicable = (METHOD_MIN[ids] <= guess) & (guess <= METHOD_MAX[ids])  # 按给定的初值判断，见calculate_wetbulb
+        T_w = np.where(applicable,np.clip(guess,bracket[0],bracket[1]),np.nan)
+        done,T_w = _newton_wetbulb(T_w,T,e,P,ids,single,max_iter,tol,status,iterations,backend,min_iter,ftol,
+                                   bracket,stats)
+        status[~applicable] = STATUS_NOT_APPLICABLE
+
+        rh = e[done]/e_T[done]
+        physical = (rh >= 0) & (rh <= 1)
+        T_w_out[done[physical]] = T_w[physical]
+        rh_out[done[physical]] = rh[physical]
+        status[done[~physical]] = STATUS_UNPHYSICAL
+
+    return (T_w_out.reshape(shape),rh_out.reshape(shape),
+            iterations.reshape(shape),status.reshape(shape))
+
+def calculate_dewpoint_array(T_g,T_w,P,method='Goff-水面',max_iter=500,tol=1e-6,backend='exact'):
+    # calculate_dewpoint的数组版，返回(露点温度,相对湿度,反解迭代次数,状态码)
+    shape,ids,single,(T_g,T_w,P) = _prepare(method,T_g,T_w,P)
+    status = np.full(T_g.size,STATUS_OK,dtype=np.int8)
+
+    with np.errstate(over='ignore',invalid='ignore',divide='ignore'):
+        applicable = (((METHOD_MIN[ids] <= T_w) & (T_w <= METHOD_MAX[ids]))
+                      | ((METHOD_MIN[ids] <= T_g) & (T_g <= METHOD_MAX[ids])))
+        es_wet = calculate_esat_array(T_w,method,backend)
+        es_dry = calculate_esat_array(T_g,method,backend)
+        gamma = 0.000667*(1+0.00115*T_w)*P
+        e = es_wet-gamma*(T_g-T_w)
+        rh = e/es_dry
+        saturated = (e >= es_dry) | (rh >= 1)
+        T_d,iterations = esat_inverse_array(e,method,max_iter,tol,backend=backend)
+        T_d = np.where(saturated,T_g,T_d)
+        rh = np.where(saturated,1.0,rh)
+
+    status[~np.isfinite(T_d)] = STATUS_FAILED
+    status[~applicable] = STATUS_NOT_APPLICABLE
+    failed = status != STATUS_OK
+    T_d[failed] = np.nan
+    rh[failed] = np.nan
+    return (T_d.reshape(shape),rh.reshape(shape),
+            iterations.reshape(shape),status.reshape(shape))
+
+def calculate_both_array(initial_guess,T_g,rh,P=1013.25,method='Goff-水面',max_iter=50,tol=1e-6,backend='exact',
+                         min_iter=0,ftol=None,stats=None):
+    # calculate_both的数组版，rh为百分比；initial_guess为None时以反解出的露点作为湿球初值
+    # 湿球的区间保护与stats同calculate_wetbulb_array
+    # 返回(露点温度,湿球温度,湿球迭代次数,状态码)，湿球失败时露点仍然保留
+    guess = np.nan if initial_guess is None else initial_guess
+    shape,ids,single,(T_g,rh,P,guess) = _prepare(method,T_g,rh,P,guess)
+    T_w_out = np.full(T_g.size,np.nan)
+    iterations = np.zeros(T_g.size,dtype=np.intp)
+    status = np.full(T_g.size,STATUS_NOT_CONVERGED,dtype=np.int8)
+
+    with np.errstate(over='ignore',invalid='ignore',divide='ignore'):
+        applicable = (METHOD_MIN[ids] <= T_g) & (T_g <= METHOD_MAX[ids])
+        e_T = calculate_esat_array(T_g,method,backend)
+        e = e_T*(rh/100)
+        T_d,_ = esat_inverse_array(e,method,max_iter,tol,backend=backend)
+        T_d[~applicable] = np.nan
+        if initial_guess is None:
+            guess = T_d
+        bracket = _bracket(T_d,T_g,P,e,e_T)
+        T_w = np.where(applicable & np.isfinite(T_d),np.clip(guess,bracket[0],bracket[1]),np.nan)
+        done,T_w = _newton_wetbulb(T_w,T_g,e,P,ids,single,max_iter,tol,status,iterations,backend,min_iter,ftol,
+                                   bracket,stats)
+        T_w_out[done] = T_w
+
+    status[~applicable] = STATUS_NOT_APPLICABLE
+    return (T_d.reshape(shape),T_w_out.reshape(shape),
+            iterations.reshape(shape),status.reshape(shape))